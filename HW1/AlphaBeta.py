@@ -0,0 +1,191 @@
+"""
+Depth-bounded alpha-beta search of the Star/Circle game
+
+- class: AlphaBeta (a Minimax that prunes)
+- methods:
+    * alphabeta
+    * value
+
+The search runs when the object is made (unless start=False).  path holds
+the chosen root move as its last element, alpha the root value for
+maxplayer.  With a transposition table a stored value ends the search of a
+position when its bound is enough for the current window, and the stored
+best move is expanded first below the root.
+
+With a MoveOrdering (see IterativeDeepening) children are expanded by
+principal variation, transposition table move, killer moves and history
+instead, moves causing a cutoff are recorded in it and path is the whole
+principal variation, root move last.  Whatever the order, an earlier move
+in the assignment's expansion order wins a tie at the root, so the result
+is the one of the plain search.  With a deadline (a time.time() value) the
+search raises SearchTimeout (carrying node_count) once it has passed,
+leaving the board wherever it was.  A SearchStats (stats) is told of
+every expansion, with its window and whether it was cut off, and of every
+table probe.
+"""
+
+import time
+
+from .Minimax import Minimax
+from .TranspositionTable import EXACT, LOWER, UPPER
+
+INFINITY = float('inf')
+# nodes between two looks at the clock
+CLOCK_INTERVAL = 1024
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class AlphaBeta(Minimax):
+
+    def __init__(self, Board, maxplayer, depth, table=None, ordering=None, deadline=None, start=True,
+                 stats=None):
+        Minimax.__init__(self, Board, maxplayer, depth, table, stats)
+        self.ordering = ordering
+        self.deadline = deadline
+        self.alpha, self.beta = -INFINITY, INFINITY
+        # some value came from the depth limit (or the table) rather than
+        # the end of the game, so a deeper search could change the result
+        self.horizon = False
+        # pv[d] : best line below the last position searched at depth d,
+        # kept when there is an ordering to hand it to
+        self.pv = [[] for d in range(self.depth + 2)]
+        self.path = []
+        # start : search from Board now; without, value() is called directly
+        if start:
+            self.alphabeta()
+
+    def alphabeta(self):
+        board = self.Board
+        self.node_count += 1
+        stats = self.stats
+        if stats is not None:
+            stats.begin(self.depth)
+        if self.depth == 0 or board.is_terminal():
+            self.alpha = self.util_farsighted = board.score
+            self.path.append(None)
+            return
+
+        moves = board.get_moves()
+        best = None
+        if not moves:
+            board.make_pass()
+            self.alpha = self.value(board, 1, self.alpha, self.beta, True)
+            board.unmake()
+            self.pv[0] = [None] + self.pv[1]
+            if stats is not None:
+                stats.expand(0, 1, False, self.alpha, -INFINITY, INFINITY, board.hash)
+
+        ordered = moves
+        if self.ordering is not None:
+            ordered = self.ordering.order(moves, 0, board.player, self.ordering.pv_move(0, True))
+        rank = dict((move, i) for i, move in enumerate(moves))
+        for move in ordered:
+            board.make(move)
+            if best is not None and rank[move] < rank[best]:
+                # expanded out of order: a tie with the best so far is
+                # enough, values being integers
+                v = self.value(board, 1, self.alpha - 1, self.beta, move is ordered[0])
+                better = v >= self.alpha
+            else:
+                v = self.value(board, 1, self.alpha, self.beta, move is ordered[0])
+                better = best is None or v > self.alpha
+            board.unmake()
+            if better:
+                best, self.alpha = move, v
+                self.pv[0] = [move] + self.pv[1]
+        self.util_farsighted = self.alpha
+        if stats is not None and moves:
+            stats.expand(0, len(moves), False, self.alpha, -INFINITY, INFINITY, board.hash)
+        if self.ordering is not None:
+            self.path = self.pv[0][::-1]
+        else:
+            self.path.append(best)
+
+    def value(self, board, depth, alpha, beta, follow=False):
+        # follow : the moves so far are the ordering's principal variation
+        self.node_count += 1
+        if self.deadline is not None and not self.node_count % CLOCK_INTERVAL and time.time() > self.deadline:
+            raise SearchTimeout(self.node_count)
+        remaining = self.depth - depth
+        ordering = self.ordering
+        if ordering is not None:
+            self.pv[depth] = []
+        if board.is_terminal():
+            return board.score
+        if remaining == 0:
+            self.horizon = True
+            return board.score
+
+        entry = None
+        if self.table is not None:
+            entry = self.table.lookup(board.hash)
+            hit = False
+            if entry is not None and entry[1] == remaining:
+                bound, v = entry[3], entry[2]
+                hit = bound == EXACT or (bound == LOWER and v >= beta) or (bound == UPPER and v <= alpha)
+            if self.stats is not None:
+                self.stats.probe(depth, hit)
+            if hit:
+                self.horizon = True
+                return v
+
+        # fail-soft: a value <= alpha is an upper bound of the true value,
+        # one >= beta a lower bound
+        low, high = alpha, beta
+        maximize = board.is_max()
+        best, bestMove = (-INFINITY if maximize else INFINITY), None
+        leaves = remaining == 1
+        score = board.score
+        first = entry[4] if entry is not None else None
+        if ordering is None:
+            moves, pv_move = board.iter_moves(first), None
+        else:
+            pv_move = ordering.pv_move(depth, follow)
+            moves = ordering.order(board.get_moves(), depth, board.player, pv_move, first)
+        searched = 0
+        for searched, move in enumerate(moves, 1):
+            if leaves:
+                # scored from the move's change of score, not played
+                self.node_count += 1
+                v = score + move[3]
+            else:
+                board.make(move)
+                v = self.value(board, depth + 1, alpha, beta, follow and move is pv_move)
+                board.unmake()
+            if v > best if maximize else v < best:
+                best, bestMove = v, move
+                if ordering is not None:
+                    self.pv[depth] = [move] + self.pv[depth + 1] if not leaves else [move]
+            if maximize:
+                if best >= beta:
+                    break
+                if best > alpha:
+                    alpha = best
+            else:
+                if best <= alpha:
+                    break
+                if best < beta:
+                    beta = best
+
+        if leaves and bestMove is not None:
+            self.horizon = True
+        if bestMove is None:
+            # no legal move: the side to move passes
+            board.make_pass()
+            best = self.value(board, depth + 1, alpha, beta, follow)
+            board.unmake()
+            if ordering is not None:
+                self.pv[depth] = [None] + self.pv[depth + 1]
+        elif ordering is not None and (best >= high if maximize else best <= low):
+            ordering.cutoff(bestMove, depth, remaining, board.player)
+        if self.stats is not None:
+            cut = bestMove is not None and (best >= high if maximize else best <= low)
+            self.stats.expand(depth, searched or 1, cut, best, low, high, board.hash)
+
+        if self.table is not None:
+            bound = UPPER if best <= low else LOWER if best >= high else EXACT
+            self.table.store(board.hash, remaining, best, bound, bestMove)
+        return best
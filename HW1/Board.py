@@ -0,0 +1,191 @@
+"""
+Game state of the Star/Circle game on bitboards
+
+- class: Board
+- methods:
+    * get_moves / iter_moves
+    * make / make_pass / unmake
+    * is_terminal
+    * interpret_move
+    * eval_after
+
+Squares are numbered sq = 8 * x + y, x = 0 for row H down to 7 for row A
+and y = 0 for column 1, so ascending square order is the assignment's
+expansion order (upper rows first, left to right).  pieces[0] and
+pieces[1] are the bitboards of the Star and Circle pieces, count[sq] the
+size of the stack on sq (only last-row squares hold more than one).
+
+One Board is searched in place: make() plays a move and unmake() takes it
+back.  The evaluation (score, for maxplayer) and the Zobrist hash are
+updated by each move instead of being recomputed from the squares, and
+the steps and jumps from every square, with their change of score, are
+tabulated when the Board is made.
+"""
+
+from .TranspositionTable import zobrist_key, SIDE_KEY, PASS_KEY
+
+ROW_NAMES = "HGFEDCBA"
+PLAYERS = ("Star", "Circle")
+PIECE = "SC"
+# row step of a move and the row a player's pieces stop on
+DIRECTION = (-1, 1)
+LAST_ROW = (0, 7)
+LAST_MASK = (0xFF << 8 * LAST_ROW[0], 0xFF << 8 * LAST_ROW[1])
+
+
+class Board(object):
+
+    def __init__(self, boardState, row_values, player, maxplayer):
+        self.player = PLAYERS.index(player)         # side to move
+        self.maxplayer = PLAYERS.index(maxplayer)
+        self.passes = 0                             # passes in a row before this position
+        self.undo = []
+
+        # weight[p][sq] : row weight of sq for player p, row_values are
+        # A..H for Star and H..A for Circle
+        weight = ([int(row_values[7 - sq // 8]) for sq in range(64)],
+                  [int(row_values[sq // 8]) for sq in range(64)])
+
+        self.pieces = [0, 0]
+        self.count = [0] * 64
+        self.score = 0
+        self.hash = SIDE_KEY if self.player == 1 else 0
+        for sq in range(64):
+            cell = boardState[sq // 8][sq % 8]
+            if cell != '0':
+                p, count = PIECE.index(cell[0]), int(cell[1:])
+                self.pieces[p] |= 1 << sq
+                self.count[sq] = count
+                self.score += count * weight[p][sq] * (1 if p == self.maxplayer else -1)
+                self.hash ^= zobrist_key(sq, p, count)
+
+        # moves[p][sq] : (destination bit, captured bit, move) of the steps
+        # and jumps of player p from sq, by destination square, where
+        # move = (origin, destination, captured square or -1,
+        #         change of score, hash of the squares emptied)
+        self.moves = ([], [])
+        for p in (0, 1):
+            sign = 1 if p == self.maxplayer else -1
+            for sq in range(64):
+                x, y = sq // 8, sq % 8
+                entries = []
+                for dy in (-1, 1):
+                    for reach in (1, 2):
+                        nx, ny = x + reach * DIRECTION[p], y + reach * dy
+                        if x == LAST_ROW[p] or not (0 <= nx < 8 and 0 <= ny < 8):
+                            continue
+                        dest = 8 * nx + ny
+                        over = 8 * (x + DIRECTION[p]) + y + dy if reach == 2 else -1
+                        gain = weight[p][dest] - weight[p][sq]
+                        emptied = zobrist_key(sq, p, 1)
+                        if over >= 0:
+                            gain += weight[1 - p][over]
+                            emptied ^= zobrist_key(over, 1 - p, 1)
+                        move = (sq, dest, over, sign * gain, emptied)
+                        entries.append((dest, 1 << dest, 1 << over if over >= 0 else 0, move))
+                entries.sort()
+                self.moves[p].append([entry[1:] for entry in entries])
+
+    def get_moves(self):
+        # legal moves of the side to move in expansion order: a step to an
+        # empty square, a jump over an opponent piece to one, or either onto
+        # the player's own stack in its last row
+        p = self.player
+        own, enemy = self.pieces[p], self.pieces[1 - p]
+        landing = ~(own | enemy) | (own & LAST_MASK[p])
+        table = self.moves[p]
+        moves = []
+        movable = own & ~LAST_MASK[p]
+        while movable:
+            low = movable & -movable
+            movable ^= low
+            for destbit, overbit, move in table[low.bit_length() - 1]:
+                if destbit & landing and (not overbit or overbit & enemy):
+                    moves.append(move)
+        return moves
+
+    def iter_moves(self, first=None):
+        # get_moves one at a time, for searches that may stop after the
+        # first few; `first` comes ahead of the rest when it is legal
+        p = self.player
+        own, enemy = self.pieces[p], self.pieces[1 - p]
+        landing = ~(own | enemy) | (own & LAST_MASK[p])
+        movable = own & ~LAST_MASK[p]
+        if first is not None:
+            origin, dest, over = first[0], first[1], first[2]
+            if (movable >> origin & 1 and landing >> dest & 1
+                    and (over < 0 or enemy >> over & 1)):
+                yield first
+        table = self.moves[p]
+        while movable:
+            low = movable & -movable
+            movable ^= low
+            for destbit, overbit, move in table[low.bit_length() - 1]:
+                if destbit & landing and (not overbit or overbit & enemy) and move is not first:
+                    yield move
+
+    def make(self, move):
+        origin, dest, over, gain, emptied = move
+        p, count = self.player, self.count
+        h = self.hash ^ SIDE_KEY ^ emptied
+        if self.passes:
+            h ^= PASS_KEY
+        stack = count[dest]
+        self.undo.append((move, self.hash, self.score, self.passes, stack))
+
+        self.pieces[p] ^= 1 << origin
+        count[origin] = 0
+        if over >= 0:
+            self.pieces[1 - p] ^= 1 << over
+            count[over] = 0
+        if stack:
+            h ^= zobrist_key(dest, p, stack)
+        self.pieces[p] |= 1 << dest
+        count[dest] = stack + 1
+
+        self.hash = h ^ zobrist_key(dest, p, stack + 1)
+        self.score += gain
+        self.passes = 0
+        self.player = 1 - p
+
+    def make_pass(self):
+        self.undo.append((None, self.hash, self.score, self.passes, 0))
+        self.hash ^= SIDE_KEY if self.passes else SIDE_KEY ^ PASS_KEY
+        self.passes += 1
+        self.player = 1 - self.player
+
+    def unmake(self):
+        move, self.hash, self.score, self.passes, stack = self.undo.pop()
+        self.player = p = 1 - self.player
+        if move is None:
+            return
+        origin, dest, over = move[0], move[1], move[2]
+        count = self.count
+        count[dest] = stack
+        if not stack:
+            self.pieces[p] ^= 1 << dest
+        self.pieces[p] |= 1 << origin
+        count[origin] = 1
+        if over >= 0:
+            self.pieces[1 - p] |= 1 << over
+            count[over] = 1
+
+    def is_terminal(self):
+        # game over: both players passed in a row, or one side has no pieces
+        return self.passes >= 2 or not self.pieces[0] or not self.pieces[1]
+
+    def is_max(self):
+        return self.player == self.maxplayer
+
+    @staticmethod
+    def interpret_xy(x, y):
+        return ROW_NAMES[x] + str(y + 1)
+
+    def interpret_move(self, move):
+        if move is None:
+            return "pass"
+        return self.interpret_xy(move[0] // 8, move[0] % 8) + "-" + self.interpret_xy(move[1] // 8, move[1] % 8)
+
+    def eval_after(self, move):
+        # maxplayer's utility once move (None for a pass) is played
+        return self.score if move is None else self.score + move[3]
@@ -0,0 +1,110 @@
+"""
+Iterative deepening around the alpha-beta search of the Star/Circle game
+
+- class: IterativeDeepening
+- class: MoveOrdering
+- methods:
+    * run
+    * order / pv_move / cutoff
+
+IterativeDeepening searches depth 1, 2, ... up to the depth limit with
+AlphaBeta, handing every iteration the principal variation of the one
+before, the killer moves and the history counts gathered so far (a
+MoveOrdering) and the same transposition table.  With a time limit it
+stops at the deadline and keeps the result of the deepest iteration that
+finished; depth 1 always runs to the end so there is a move to play.  It
+also stops once an iteration reaches the end of the game on every line.
+
+depth_counts : (depth, node_count, seconds) of every finished iteration
+stats        : a SearchStats given to every iteration, or None
+node_count   : nodes of all iterations, the unfinished one included
+"""
+
+import time
+
+from .AlphaBeta import AlphaBeta, SearchTimeout
+
+
+class MoveOrdering(object):
+
+    def __init__(self, killer_slots=2):
+        self.pv = []                    # principal variation, root move first
+        self.killers = {}               # depth -> moves that last caused a cutoff there
+        self.history = ({}, {})         # per player (origin, destination) -> score
+        self.killer_slots = killer_slots
+
+    def pv_move(self, depth, follow):
+        # move of the principal variation at depth while on it
+        if follow and depth < len(self.pv):
+            return self.pv[depth]
+        return None
+
+    def order(self, moves, depth, player, *first):
+        # moves in `first` (principal variation, table move) lead, then the
+        # killers of the depth, then by history; ties keep expansion order
+        killers = self.killers.get(depth, ())
+        history = self.history[player]
+        lead = [move for move in first if move is not None]
+
+        def key(move):
+            if move in lead:
+                return (0, lead.index(move))
+            if move in killers:
+                return (1, killers.index(move))
+            return (2, -history.get(move[:2], 0))
+        return sorted(moves, key=key)
+
+    def cutoff(self, move, depth, remaining, player):
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.killer_slots:]
+        history = self.history[player]
+        history[move[:2]] = history.get(move[:2], 0) + remaining * remaining
+
+
+class IterativeDeepening(object):
+
+    def __init__(self, Board, maxplayer, depth, table=None, time_limit=None, stats=None):
+        self.Board = Board
+        self.maxplayer = maxplayer
+        self.depth = int(depth)
+        self.table = table
+        self.deadline = time.time() + time_limit if time_limit else None
+        self.ordering = MoveOrdering()
+        self.stats = stats
+
+        self.node_count = 0
+        self.depth_counts = []
+        self.completed = 0              # deepest finished iteration
+        self.path = [None]
+        self.alpha = self.util_farsighted = None
+        self.timed_out = False
+        self.run()
+
+    def run(self):
+        for depth in range(min(self.depth, 1), self.depth + 1):
+            start = time.time()
+            try:
+                game = AlphaBeta(self.Board, self.maxplayer, depth, self.table, self.ordering,
+                                 self.deadline if depth > 1 else None, stats=self.stats)
+            except SearchTimeout as e:
+                # unwind the moves the search left played
+                while self.Board.undo:
+                    self.Board.unmake()
+                self.node_count += e.args[0]
+                self.timed_out = True
+                break
+
+            self.node_count += game.node_count
+            self.depth_counts.append((depth, game.node_count, time.time() - start))
+            self.completed = depth
+            self.path = list(game.path)
+            self.alpha = self.util_farsighted = game.alpha
+            self.ordering.pv = self.path[::-1]
+            if not game.horizon:
+                # the whole game tree fits in this depth, deeper is the same
+                break
+            if self.deadline is not None and time.time() > self.deadline:
+                self.timed_out = depth < self.depth
+                break
@@ -0,0 +1,120 @@
+"""
+Depth-bounded minimax search of the Star/Circle game
+
+- class: Minimax
+- methods:
+    * minimax
+    * value
+    * print_nextState
+
+Values are for maxplayer, the player to move at the root.  The search
+plays moves on one Board with make/unmake; children at the depth limit are
+scored from the move's change of score without being played.  Every state
+the search takes as input is counted in node_count; with a transposition
+table a position already searched to the same remaining depth is counted
+but not expanded again.  Values are reused at the same remaining depth
+only, so the results are exactly the depth-bounded values of the
+assignment.  With a SearchStats (stats) every expansion and table probe
+is reported to it.
+"""
+
+from .TranspositionTable import EXACT
+
+
+class Minimax(object):
+
+    def __init__(self, Board, maxplayer, depth, table=None, stats=None):
+        self.Board = Board
+        self.maxplayer = maxplayer
+        self.depth = int(depth)
+        self.table = table
+        self.stats = stats
+        self.node_count = 0
+        self.nextMove = None
+        self.util_myopic = None
+        self.util_farsighted = None
+
+    def minimax(self, board, depth):
+        # best move at the root (None for a pass, or when the root is a
+        # leaf); the first move in expansion order wins ties
+        self.node_count += 1
+        stats = self.stats
+        if stats is not None:
+            stats.begin(self.depth - depth)
+        if depth == self.depth or board.is_terminal():
+            self.util_farsighted = board.score
+            return None
+
+        moves = board.get_moves()
+        if not moves:
+            board.make_pass()
+            self.util_farsighted = self.value(board, depth + 1)
+            board.unmake()
+            if stats is not None:
+                stats.expand(depth, 1, False, self.util_farsighted, h=board.hash)
+            return None
+
+        best = None
+        for move in moves:
+            board.make(move)
+            value = self.value(board, depth + 1)
+            board.unmake()
+            if best is None or value > self.util_farsighted:
+                best, self.util_farsighted = move, value
+        if stats is not None:
+            stats.expand(depth, len(moves), False, self.util_farsighted, h=board.hash)
+        return best
+
+    def value(self, board, depth):
+        self.node_count += 1
+        remaining = self.depth - depth
+        if remaining == 0 or board.is_terminal():
+            return board.score
+
+        entry = None
+        if self.table is not None:
+            entry = self.table.lookup(board.hash)
+            hit = entry is not None and entry[1] == remaining
+            if self.stats is not None:
+                self.stats.probe(depth, hit)
+            if hit:
+                return entry[2]
+
+        maximize = board.is_max()
+        moves = board.get_moves()
+        if not moves:
+            board.make_pass()
+            best, bestMove = self.value(board, depth + 1), None
+            board.unmake()
+        elif remaining == 1:
+            # the children are leaves
+            self.node_count += len(moves)
+            best, bestMove = None, None
+            score = board.score
+            for move in moves:
+                v = score + move[3]
+                if best is None or (v > best if maximize else v < best):
+                    best, bestMove = v, move
+        else:
+            if entry is not None and entry[4] in moves:
+                moves.remove(entry[4])
+                moves.insert(0, entry[4])
+            best, bestMove = None, None
+            for move in moves:
+                board.make(move)
+                v = self.value(board, depth + 1)
+                board.unmake()
+                if best is None or (v > best if maximize else v < best):
+                    best, bestMove = v, move
+
+        if self.stats is not None:
+            self.stats.expand(depth, len(moves) or 1, False, best, h=board.hash)
+        if self.table is not None:
+            self.table.store(board.hash, remaining, best, EXACT, bestMove)
+        return best
+
+    @staticmethod
+    def print_nextState(nextMove, util_myopic, util_farsighted, node_count, output_file="output.txt"):
+        wfile = open(output_file, "w")
+        wfile.write(nextMove + "\n" + str(util_myopic) + "\n" + str(util_farsighted) + "\n" + str(node_count))
+        wfile.close()
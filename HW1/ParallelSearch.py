@@ -0,0 +1,111 @@
+"""
+Parallel root split of the Star/Circle game search
+
+- class: ParallelSearch
+- methods:
+    * run
+
+Young Brothers Wait at the root: the first root move (the eldest brother)
+is searched in this process to get a bound, then the other root moves are
+searched by a pool of worker processes, each with its own copy of the
+board and its own transposition table.  For ALPHABETA the best root value
+so far is shared between the workers (alpha, a multiprocessing.Value)
+and every root move is searched with the window (alpha - 1, inf) read when
+it starts: a move that can tie the best gets its exact value, so the move
+and values are those of the sequential search, ties going to the earlier
+move in expansion order.  MINIMAX root moves are searched in full.
+
+node_count adds up the nodes of all processes; with ALPHABETA it depends
+on the order the workers finish in.
+"""
+
+import multiprocessing
+
+from .Minimax import Minimax
+from .AlphaBeta import AlphaBeta
+from .TranspositionTable import TranspositionTable
+
+INFINITY = float('inf')
+
+# state of a worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(board, maxplayer, depth, algorithm, table_size, alpha):
+    _worker.update(board=board, maxplayer=maxplayer, depth=depth, algorithm=algorithm,
+                   alpha=alpha, moves=board.get_moves(),
+                   table=TranspositionTable(table_size) if table_size else None)
+
+
+def _search_move(index):
+    # (index, value, node_count) of root move `index`
+    w = _worker
+    board = w['board']
+    board.make(w['moves'][index])
+    if w['algorithm'] == "MINIMAX":
+        game = Minimax(board, w['maxplayer'], w['depth'], w['table'])
+        v = game.value(board, 1)
+    else:
+        game = AlphaBeta(board, w['maxplayer'], w['depth'], w['table'], start=False)
+        v = game.value(board, 1, w['alpha'].value - 1, INFINITY)
+        with w['alpha'].get_lock():
+            if v > w['alpha'].value:
+                w['alpha'].value = v
+    board.unmake()
+    return index, v, game.node_count
+
+
+class ParallelSearch(object):
+
+    def __init__(self, Board, maxplayer, depth, algorithm, workers, table_size=0):
+        self.Board = Board
+        self.maxplayer = maxplayer
+        self.depth = int(depth)
+        self.algorithm = algorithm
+        self.workers = workers
+        self.table_size = table_size
+        self.node_count = 0
+        self.path = []
+        self.alpha = self.util_farsighted = None
+        self.run()
+
+    def run(self):
+        board = self.Board
+        moves = board.get_moves() if self.depth > 0 and not board.is_terminal() else []
+        if len(moves) < 2 or self.workers < 2:
+            # nothing to split: the sequential search
+            table = TranspositionTable(self.table_size) if self.table_size else None
+            if self.algorithm == "MINIMAX":
+                game = Minimax(board, self.maxplayer, self.depth, table)
+                self.path = [game.minimax(board, 0)]
+            else:
+                game = AlphaBeta(board, self.maxplayer, self.depth, table)
+                self.path = game.path
+            self.node_count = game.node_count
+            self.alpha = self.util_farsighted = game.util_farsighted
+            return
+
+        # the eldest brother, here
+        self.node_count = 1
+        _init_worker(board, self.maxplayer, self.depth, self.algorithm, self.table_size,
+                     multiprocessing.Value('d', -INFINITY))
+        results = [_search_move(0)]
+
+        # the younger ones, in the pool
+        pool = multiprocessing.Pool(self.workers, _init_worker,
+                                    (board, self.maxplayer, self.depth, self.algorithm, self.table_size,
+                                     _worker['alpha']))
+        try:
+            results.extend(pool.imap_unordered(_search_move, range(1, len(moves))))
+        finally:
+            pool.close()
+            pool.join()
+        _worker.clear()
+
+        best = None
+        for index, v, node_count in results:
+            self.node_count += node_count
+            if best is None or v > best[1] or (v == best[1] and index < best[0]):
+                best = (index, v)
+        self.path = [moves[best[0]]]
+        self.alpha = self.util_farsighted = best[1]
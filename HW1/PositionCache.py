@@ -0,0 +1,150 @@
+"""
+Position cache of the Star/Circle game kept on disk across runs
+
+Results of whole searches (the four lines of output.txt) are kept in a
+memory-mapped file so a position searched before is answered without a
+search.  A position is keyed by its pieces (the Star and Circle bitboards
+and the stacks of the last rows), the side to move and maxplayer, the
+depth limit, the ROW_VALUES and how it was searched (algorithm, iterative
+deepening, transposition table size and workers, which change the node
+count).  The whole key is stored with its result and compared on lookup,
+so a result is only ever returned for the same question.
+
+The file holds a fixed number of buckets of WAYS slots, a bucket being
+picked by the board's Zobrist hash and the rest of the key.  Every lookup
+or store stamps the slot from a clock kept in the file, and a store into a
+full bucket replaces its least recently used slot.
+
+- class: PositionCache
+- methods:
+    * key
+    * lookup
+    * store
+    * close
+
+result : (nextMove, myopic utility, farsighted utility, node_count)
+"""
+
+import os
+import mmap
+import zlib
+import struct
+
+try:
+    import fcntl
+except ImportError:
+    # no file locking (Windows): one process at a time per cache file
+    fcntl = None
+
+MAGIC = b'SCWCACHE'
+VERSION = 1
+WAYS = 4
+
+# magic, version, buckets, clock
+HEADER = struct.Struct('<8sIIQ')
+# Star and Circle bitboards, stacks of rows H and A, ROW_VALUES, side to
+# move, maxplayer, depth, algorithm (bit 0 ALPHABETA, bit 1 iterative),
+# table size, workers
+KEY = struct.Struct('<QQ16H8qBBHBIH')
+# stamp (0 for an empty slot), key, nextMove, myopic, farsighted, node_count
+SLOT = struct.Struct('<Q%ds5sqqQ' % KEY.size)
+
+
+class PositionCache(object):
+
+    def __init__(self, file_name, buckets=1 << 12):
+        self.file_name = file_name
+        self.buckets = max(int(buckets), 1)
+        self.hits = self.misses = self.stores = 0
+        size = HEADER.size + self.buckets * WAYS * SLOT.size
+
+        # opened without truncating and checked under the lock, so a process
+        # starting up never cuts a file short under another one's map; a
+        # file of another layout or size is started over (processes sharing
+        # a file must agree on buckets)
+        self.file = os.fdopen(os.open(file_name, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        with self._locked():
+            fresh = os.fstat(self.file.fileno()).st_size != size
+            if not fresh:
+                magic, version, buckets, clock = HEADER.unpack(self.file.read(HEADER.size))
+                fresh = (magic, version, buckets) != (MAGIC, VERSION, self.buckets)
+            if fresh:
+                self.file.seek(0)
+                self.file.truncate()
+                self.file.write(HEADER.pack(MAGIC, VERSION, self.buckets, 0))
+                self.file.write(b'\0' * (size - HEADER.size))
+                self.file.flush()
+            self.map = mmap.mmap(self.file.fileno(), size)
+
+    def key(self, board, row_values, depth, algorithm, iterative=False, table_size=0, workers=1):
+        # (bucket, packed key) of a search of board; algorithm is "MINIMAX"
+        # or "ALPHABETA", iterative only matters for ALPHABETA
+        stacks = [board.count[sq] for sq in range(8)] + [board.count[sq] for sq in range(56, 64)]
+        mode = (algorithm == "ALPHABETA") | (bool(iterative) and algorithm == "ALPHABETA") << 1
+        packed = KEY.pack(board.pieces[0], board.pieces[1], *(stacks + [int(v) for v in row_values] +
+                          [board.player, board.maxplayer, int(depth), mode, table_size, workers]))
+        return (board.hash ^ zlib.crc32(packed)) % self.buckets, packed
+
+    def lookup(self, key):
+        # result stored for key, None when there is none
+        bucket, packed = key
+        with self._locked():
+            for offset in self._slots(bucket):
+                stamp, slot_key, nextMove, myopic, farsighted, node_count = SLOT.unpack_from(self.map, offset)
+                if stamp and slot_key == packed:
+                    SLOT.pack_into(self.map, offset, self._tick(), slot_key, nextMove, myopic, farsighted,
+                                   node_count)
+                    self.hits += 1
+                    return nextMove.rstrip(b'\0').decode('ascii'), myopic, farsighted, node_count
+        self.misses += 1
+        return None
+
+    def store(self, key, nextMove, myopic, farsighted, node_count):
+        # into the slot of key if there is one, else the bucket's empty or
+        # least recently used slot
+        bucket, packed = key
+        with self._locked():
+            victim = None
+            for offset in self._slots(bucket):
+                stamp, slot_key = SLOT.unpack_from(self.map, offset)[:2]
+                if not stamp or slot_key == packed:
+                    victim = offset
+                    break
+                if victim is None or stamp < oldest:
+                    victim, oldest = offset, stamp
+            SLOT.pack_into(self.map, victim, self._tick(), packed, nextMove.encode('ascii'),
+                           int(myopic), int(farsighted), node_count)
+        self.stores += 1
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+    def _slots(self, bucket):
+        first = HEADER.size + bucket * WAYS * SLOT.size
+        return range(first, first + WAYS * SLOT.size, SLOT.size)
+
+    def _tick(self):
+        # next value of the clock in the header
+        magic, version, buckets, clock = HEADER.unpack_from(self.map, 0)
+        HEADER.pack_into(self.map, 0, magic, version, buckets, clock + 1)
+        return clock + 1
+
+    def _locked(self):
+        return _FileLock(self.file)
+
+
+class _FileLock(object):
+    # exclusive lock of the cache file while a with block runs
+
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
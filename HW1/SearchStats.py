@@ -0,0 +1,112 @@
+"""
+Instrumentation of the Star/Circle game search
+
+- class: SearchStats
+- methods:
+    * begin
+    * expand / probe
+    * summary
+    * close
+
+A search given a SearchStats (Minimax, AlphaBeta, IterativeDeepening)
+reports to it every position it expands and every transposition table
+probe; without one it only tests `stats is not None`.  Counters are kept
+per ply (0 for the root) and per search: begin() starts a new one, so
+iterative deepening gets a table for every iteration.
+
+per ply :
+    - nodes         : positions reached at the ply, leaves included
+    - expanded      : positions whose moves were searched
+    - children      : moves searched from them (a pass counts as one)
+    - cutoffs       : expansions that failed high (or low) against the
+                      window, the search of their moves stopping there
+    - first_cutoffs : ... of those, on the first move searched
+    - tt_probes / tt_hits : table lookups, and those whose value was used
+    - branching     : nodes of the next ply over nodes of this one
+
+With a trace file every sample-th expansion is written to it as a line of
+JSON: search depth, ply, position hash, window (null for an infinite
+bound or for MINIMAX), value, moves searched and whether it was a cutoff.
+"""
+
+import json
+
+COUNTERS = ('nodes', 'expanded', 'children', 'cutoffs', 'first_cutoffs', 'tt_probes', 'tt_hits')
+INFINITY = float('inf')
+
+
+class SearchStats(object):
+
+    def __init__(self, trace_file=None, sample=1):
+        self.searches = []              # (depth limit, {counter: per ply list})
+        self.counters = None
+        self.depth = None
+        self.trace = open(trace_file, 'w') if trace_file else None
+        self.sample = max(int(sample), 1)
+        self.expansions = 0
+
+    def begin(self, depth):
+        # a search of depth plies starts at its root
+        self.depth = depth
+        self.counters = dict((name, [0] * (depth + 2)) for name in COUNTERS)
+        self.counters['nodes'][0] = 1
+        self.searches.append((depth, self.counters))
+
+    def expand(self, ply, searched, cutoff, value, alpha=None, beta=None, h=0):
+        # the position at ply searched `searched` moves and is worth value;
+        # cutoff : alpha-beta stopped it early
+        c = self.counters
+        c['expanded'][ply] += 1
+        c['children'][ply] += searched
+        c['nodes'][ply + 1] += searched
+        if cutoff:
+            c['cutoffs'][ply] += 1
+            if searched == 1:
+                c['first_cutoffs'][ply] += 1
+        self.expansions += 1
+        if self.trace is not None and not self.expansions % self.sample:
+            self.trace.write(json.dumps([self.depth, ply, '%016x' % h,
+                                         _bound(alpha), _bound(beta), value, searched, bool(cutoff)]) + '\n')
+
+    def probe(self, ply, hit):
+        # a table lookup at ply; hit : its value was returned
+        c = self.counters
+        c['tt_probes'][ply] += 1
+        if hit:
+            c['tt_hits'][ply] += 1
+
+    def summary(self):
+        # per search: depth, plies (a dict of counters per ply reached),
+        # totals and the effective branching factor, the geometric mean of
+        # the branching of the plies: (deepest nodes / root nodes) ** (1 / plies)
+        searches = []
+        for depth, counters in self.searches:
+            nodes = counters['nodes']
+            plies = []
+            for ply in range(len(nodes)):
+                if not nodes[ply]:
+                    break
+                entry = dict((name, counters[name][ply]) for name in COUNTERS)
+                next_nodes = nodes[ply + 1] if ply + 1 < len(nodes) else 0
+                entry['ply'] = ply
+                entry['branching'] = round(float(next_nodes) / nodes[ply], 3) if next_nodes else None
+                plies.append(entry)
+            deepest = len(plies) - 1
+            totals = dict((name, sum(counters[name])) for name in COUNTERS)
+            cutoffs = totals['cutoffs']
+            searches.append({'depth': depth, 'plies': plies, 'totals': totals,
+                             'branching': round((float(nodes[deepest]) / nodes[0]) ** (1.0 / deepest), 3)
+                             if deepest > 0 else None,
+                             'first_cutoff_rate': round(float(totals['first_cutoffs']) / cutoffs, 3)
+                             if cutoffs else None})
+        return searches
+
+    def close(self):
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+
+def _bound(v):
+    # JSON has no infinity
+    return None if v is None or v in (INFINITY, -INFINITY) else v
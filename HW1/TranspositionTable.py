@@ -0,0 +1,74 @@
+"""
+Transposition table for the Star/Circle game search
+
+Positions reached by different move orders are searched once.  A position
+is keyed by its Zobrist hash (see Board), a bucket is picked by the low
+bits of the hash and holds two entries: one kept for the deepest search of
+its position (depth-preferred) and one replaced by every other store.
+
+- class: TranspositionTable
+- methods:
+    * lookup
+    * store
+
+entry : (hash, depth, value, bound, move)
+    - depth : plies searched below the position
+    - value : minimax value for maxplayer
+    - bound : EXACT, LOWER (value <= true value) or UPPER (value >= true value)
+    - move  : best move found (see Board), None for a pass
+"""
+
+import random
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Zobrist keys of a stack of 1..MAX_STACK Star or Circle pieces on every
+# square, the side to move and the pass flag, drawn from a fixed seed so
+# hashes are the same in every run
+MAX_STACK = 64
+_rng = random.Random(561)
+_SQUARE_KEYS = [_rng.getrandbits(64) for i in range(64 * 2 * MAX_STACK)]
+SIDE_KEY = _rng.getrandbits(64)
+PASS_KEY = _rng.getrandbits(64)
+
+
+def zobrist_key(sq, side, count):
+    # sq : 8 * row (0 for H) + column, side : 0 Star, 1 Circle
+    return _SQUARE_KEYS[(sq * 2 + side) * MAX_STACK + min(count, MAX_STACK) - 1]
+
+
+class TranspositionTable(object):
+
+    def __init__(self, size=1 << 16):
+        # size : number of buckets, rounded down to a power of two
+        self.size = 1 << (max(int(size), 1).bit_length() - 1)
+        self.mask = self.size - 1
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+        self.probes = self.hits = self.stores = 0
+
+    def lookup(self, h):
+        # entry of position h, the deeper one when both slots hold it
+        self.probes += 1
+        i = h & self.mask
+        deep, recent = self.deep[i], self.recent[i]
+        if deep is not None and deep[0] == h:
+            self.hits += 1
+            return deep
+        if recent is not None and recent[0] == h:
+            self.hits += 1
+            return recent
+        return None
+
+    def store(self, h, depth, value, bound, move):
+        self.stores += 1
+        i = h & self.mask
+        entry = (h, depth, value, bound, move)
+        deep = self.deep[i]
+        if deep is None or deep[0] == h:
+            self.deep[i] = entry
+        elif depth >= deep[1]:
+            # the shallower position keeps the always-replace slot
+            self.deep[i], self.recent[i] = entry, deep
+        else:
+            self.recent[i] = entry
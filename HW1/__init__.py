@@ -0,0 +1,11 @@
+"""
+Star/Circle game search (homework #1 for A.I. spring class CSCI561)
+
+- engine : search(board, player, depth, algorithm, row_values) and
+           search_batch(positions) for use from other code
+- hw1cs561s2018 : the input.txt / output.txt driver
+
+The other modules hold one class each (Board, Minimax, AlphaBeta, ...).
+"""
+
+from .engine import search, search_batch, load_position
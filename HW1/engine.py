@@ -0,0 +1,194 @@
+"""
+Search engine of the Star/Circle game, for use from other code
+
+- functions:
+    * search
+    * search_batch
+    * load_position
+    * batch_inputs / batch_output
+
+search() answers one position in this process and returns its result as a
+dict instead of writing output.txt; search_batch() answers a stream of
+positions in one warm process, or across a pool of them, yielding their
+results in order.  Nothing here logs: callers get the per-depth counts of
+iterative deepening in the result and report them as they like.
+
+HW1 is a package: `from HW1 import engine` (or `from HW1 import search`).
+
+position : dict of an input file (see load_position)
+    - board      : 8 rows, H first, each a list of cells ('0', 'S1', 'C2', ...)
+                   or the comma separated line of the input
+    - player     : "Star" or "Circle", maxplayer and side to move
+    - depth      : depth limit
+    - algorithm  : "MINIMAX" or "ALPHABETA"
+    - row_values : 8 row weights, A first
+    - workers    : the input's optional worker count, 1 without one
+
+result : dict
+    - move         : next move ("F4-H2", or "pass")
+    - myopic       : utility for player once move is played
+    - farsighted   : minimax value of the position for player
+    - nodes        : node expansion count
+    - time         : seconds spent
+    - cached       : the result came from the position cache
+    - timed_out    : a time limit stopped iterative deepening early
+    - depth_counts : (depth, nodes, seconds) of each finished iteration
+    - stats        : SearchStats.summary() of the searches run, with a
+                     SearchStats (not for cached results)
+"""
+
+import os
+import time
+import multiprocessing
+
+from .Minimax import Minimax
+from .Board import Board
+from .AlphaBeta import AlphaBeta
+from .IterativeDeepening import IterativeDeepening
+from .ParallelSearch import ParallelSearch
+from .TranspositionTable import TranspositionTable
+from .PositionCache import PositionCache
+from .SearchStats import SearchStats
+
+# transposition table buckets, 0 to search without one.  Off by default:
+# the table saves nodes, so node_count would no longer be the assignment's
+TABLE_SIZE = 0
+
+# state of a search_batch worker process, set by _init_batch
+_batch = {}
+
+
+def load_position(input_file):
+    # position of an input.txt; a line after the row values gives the
+    # number of worker processes to split the search over
+    with open(input_file) as rfile:
+        lines = rfile.read().splitlines()
+    lines += [''] * (13 - len(lines))
+    return {"player": lines[0].strip(),
+            "algorithm": lines[1].strip(),
+            "depth": int(lines[2].strip()),
+            "board": [lines[3 + i].strip().split(',') for i in range(8)],
+            "row_values": lines[11].strip().split(','),
+            "workers": int(lines[12].strip()) if lines[12].strip() else 1}
+
+
+def search(board, player, depth, algorithm, row_values, table_size=TABLE_SIZE, iterative=False,
+           time_limit=None, workers=1, cache=None, stats=None):
+    # best move of player on board; iterative and time_limit apply to
+    # ALPHABETA, cache is a PositionCache looked up before searching and
+    # stats a SearchStats to report to (one process searches only)
+    start = time.time()
+    boardState = [row.split(',') if isinstance(row, str) else list(row) for row in board]
+    game_board = Board(boardState, row_values, player, player)
+    depth = int(depth)
+    iterative = iterative or time_limit is not None
+
+    key = None
+    if cache is not None:
+        key = cache.key(game_board, row_values, depth, algorithm, iterative, table_size, workers)
+        hit = cache.lookup(key)
+        if hit is not None:
+            return {"move": hit[0], "myopic": hit[1], "farsighted": hit[2], "nodes": hit[3],
+                    "time": time.time() - start, "cached": True, "timed_out": False, "depth_counts": []}
+    if stats is not None and workers > 1:
+        raise ValueError("search statistics are gathered by one process searches only")
+
+    searches = len(stats.searches) if stats is not None else 0
+
+    table = TranspositionTable(table_size) if table_size else None
+    depth_counts, timed_out = [], False
+    if algorithm == "MINIMAX":
+        if workers > 1:
+            game = ParallelSearch(game_board, player, depth, algorithm, workers, table_size)
+            move = game.path[-1]
+        else:
+            game = Minimax(game_board, player, depth, table, stats)
+            move = game.minimax(game_board, 0)
+        farsighted = game.util_farsighted
+    elif algorithm == "ALPHABETA":
+        if iterative:
+            game = IterativeDeepening(game_board, player, depth, table, time_limit, stats)
+            depth_counts, timed_out = game.depth_counts, game.timed_out
+        elif workers > 1:
+            game = ParallelSearch(game_board, player, depth, algorithm, workers, table_size)
+        else:
+            game = AlphaBeta(game_board, player, depth, table, stats=stats)
+        move = game.path[-1]
+        # the root is maxplayer's, so its value is the final alpha
+        farsighted = game.alpha
+    else:
+        raise ValueError("unknown algorithm %r" % algorithm)
+
+    result = {"move": game_board.interpret_move(move), "myopic": game_board.eval_after(move),
+              "farsighted": farsighted, "nodes": game.node_count, "time": time.time() - start,
+              "cached": False, "timed_out": timed_out, "depth_counts": depth_counts}
+    if stats is not None:
+        result["stats"] = stats.summary()[searches:]
+    if cache is not None and not timed_out:
+        cache.store(key, result["move"], result["myopic"], result["farsighted"], result["nodes"])
+    return result
+
+
+def _search_position(position, options):
+    if options.pop("instrument", False):
+        options["stats"] = SearchStats()
+    return search(position["board"], position["player"], position["depth"], position["algorithm"],
+                  position["row_values"], **options)
+
+
+def _init_batch(options, cache_file):
+    _batch.update(options=options, cache=PositionCache(cache_file) if cache_file else None)
+
+
+def _search_batch_position(position):
+    return _search_position(position, dict(_batch["options"], cache=_batch["cache"]))
+
+
+def search_batch(positions, processes=1, cache_file=None, **options):
+    # results of an iterable of positions, in order, searched in this
+    # process or spread over `processes` worker processes (each search
+    # then runs on one: pool workers cannot start processes of their own);
+    # options are those of search(), cache_file a PositionCache file, and
+    # instrument=True adds the stats of every search to its result
+    if processes < 2:
+        cache = PositionCache(cache_file) if cache_file else None
+        try:
+            for position in positions:
+                yield _search_position(position, dict(options, cache=cache))
+        finally:
+            if cache is not None:
+                cache.close()
+        return
+
+    options = dict(options, workers=1)
+    pool = multiprocessing.Pool(processes, _init_batch, (options, cache_file))
+    try:
+        for result in pool.imap(_search_batch_position, positions):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def batch_inputs(paths):
+    # input files named by paths: a directory stands for its input*.txt
+    # files, any other file is a manifest listing inputs one per line
+    # (relative to the manifest)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = [n for n in sorted(os.listdir(path))
+                     if n.startswith('input') and n.endswith('.txt') and not n.endswith('.out.txt')]
+            files.extend(os.path.join(path, n) for n in names)
+        else:
+            base = os.path.dirname(path)
+            with open(path) as f:
+                files.extend(os.path.join(base, line.strip()) for line in f
+                             if line.strip() and not line.startswith('#'))
+    return files
+
+
+def batch_output(input_file):
+    # N.txt -> N.out.txt, leaving the expected outputN.txt files alone
+    root, ext = os.path.splitext(input_file)
+    return root + '.out' + ext
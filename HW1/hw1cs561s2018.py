@@ -1,123 +1,164 @@
-
-"""
-This is homework #1 for A.I. spring class CSCI561
-
-Simple checker game by adopting Minimax, Alphabeta Algorithm
-
-- __main file__ -> class: starCircleWar
-- methods:
-    * parseInputFile
-    * run_minimax
-    * run_alphabeta
-
-input : input.txt
-output : output.txt
-    - nextMove
-    - myopic utility value
-    - farsighted utility value
-    - total node expansion count
-"""
-
-__version__ = '0.8'
-__author__ = 'Chanshin Peter Park'
-
-import logging
-
-from Minimax import Minimax
-from Board import Board
-from AlphaBeta import AlphaBeta
-
-
-class starCircleWar(object):
-
-    def __init__(self):
-        logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-
-        input_file = "input.txt"
-        param = self.parseInputFile(input_file)
-
-        self.initialBoardState = param["CURRENT_BOARD_STATE"]
-        self.maxplayer = param["PLAYER"]
-        self.depth = param["DEPTH_LIMIT"]
-        self.row_values = param["ROW_VALUES"]
-        self.algorithm = {"MINIMAX": 0, "ALPHABETA": 1}[param["ALGORITHM"]]
-
-        #Initialize Gaming Board
-        self.Board = Board(self.initialBoardState, self.row_values, self.maxplayer, None, 0, 0, 0, 0, self.maxplayer)
-
-        # Play Game
-        if self.algorithm == 0:
-            self.run_minimax()
-        elif self.algorithm == 1:
-            self.run_alphabeta()
-
-    @staticmethod
-    def parseInputFile(input_file):
-        param = {}
-        rfile = open(input_file)
-
-        param["PLAYER"] = rfile.readline().strip()
-        param["ALGORITHM"] = rfile.readline().strip()
-        param["DEPTH_LIMIT"] = rfile.readline().strip()
-
-        # boardState : state of starting board
-        boardState = [[0]*8 for i in range(8)]
-        for i in range(8):
-            boardState[i] = list(rfile.readline().rstrip().split(','))
-        param["CURRENT_BOARD_STATE"] = boardState
-
-        # row_values : weight of each row
-        row_values = list(rfile.readline().rstrip().split(','))
-        param["ROW_VALUES"] = row_values
-
-        return param
-
-    def run_minimax(self):
-        game = Minimax(self.Board, self.maxplayer, self.depth)
-        bestscore = game.minimax(game.Board,0)
-        #print bestscore
-
-        if bestscore.PrevX == bestscore.X and bestscore.PrevX == bestscore.Y:
-            game.nextMove = "pass"
-        else:
-            game.nextMove = bestscore.interpret_xy(bestscore.PrevX, bestscore.PrevY) + "-" + bestscore.interpret_xy(bestscore.X, bestscore.Y)
-        game.util_myopic = bestscore.get_eval(bestscore.boardState)
-
-        # print "nextMove:" + game.nextMove
-        # print "myopic:" + str(game.util_myopic)
-        # print "farsighted : " + str(game.util_farsighted)
-        # print "nodeCount:" + str(game.node_count)
-        game.print_nextState(game.nextMove,game.util_myopic,game.util_farsighted,game.node_count)
-
-    def run_alphabeta(self):
-        game = AlphaBeta(self.Board, self.maxplayer, self.depth)
-        # print game.path
-        # for i in range(len(game.path)):
-        #      print game.path[i]
-
-        first = game.path.pop(len(game.path)-1)
-
-        if isinstance(first,Board) != 1:
-            game.nextMove = first[0]
-            game.util_myopic = first[1]
-        else:
-            if first.PrevX == first.X and first.PrevX == first.Y:
-                game.nextMove = "pass"
-            else:
-                game.nextMove = first.interpret_xy(first.PrevX, first.PrevY) + "-" + first.interpret_xy(
-                    first.X, first.Y)
-            game.util_myopic = first.get_eval(first.boardState)
-
-        if self.maxplayer == 'Star':
-            game.util_farsighted = game.alpha
-        else:
-            game.util_farsighted = game.beta
-        # print "nextMove:" + game.nextMove
-        # print "myopic:" + str(game.util_myopic)
-        # print "farsighted : " + str(game.util_farsighted)
-        # print "nodeCount:" + str(game.node_count)
-        game.print_nextState(game.nextMove,game.util_myopic,game.util_farsighted,game.node_count)
-
-if __name__ == '__main__':
-    starCircleWar()
-#game.parseInputFile('input.txt')
\ No newline at end of file
+
+"""
+This is homework #1 for A.I. spring class CSCI561
+
+Simple checker game by adopting Minimax, Alphabeta Algorithm
+
+- __main file__ -> class: starCircleWar
+- methods:
+    * run
+- functions:
+    * play_batch
+    * main
+
+The search itself is in the HW1 package (HW1.engine: search,
+search_batch), which other code can import; this file reads input.txt,
+writes output.txt and logs.
+
+input : input.txt
+    - an optional line after the row values gives the number of worker
+      processes to split the search over (see ParallelSearch)
+output : output.txt
+    - nextMove
+    - myopic utility value
+    - farsighted utility value
+    - total node expansion count
+cache : with --cache FILE, results are kept in FILE across runs and a
+        position searched before is answered from it (see PositionCache)
+batch : with --batch PATH..., every input found is answered in this one
+        process (or --workers of them) and N.txt gets N.out.txt
+stats : with --stats FILE, counters per ply of every search (see
+        SearchStats) go to FILE as JSON; --trace FILE samples expansions
+"""
+
+__version__ = '0.9'
+__author__ = 'Chanshin Peter Park'
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+if __name__ == '__main__':
+    # run as a script: make the HW1 package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HW1 import engine
+from HW1.Minimax import Minimax
+from HW1.PositionCache import PositionCache
+from HW1.SearchStats import SearchStats
+from HW1.engine import TABLE_SIZE
+
+
+class starCircleWar(object):
+
+    def __init__(self, input_file="input.txt", table_size=TABLE_SIZE, iterative=False, time_limit=None,
+                 workers=None, cache_file=None, stats=None):
+        self.position = engine.load_position(input_file)
+        self.options = {"table_size": table_size, "iterative": iterative, "time_limit": time_limit,
+                        # processes to split the root over, the flag overriding input.txt
+                        "workers": workers if workers is not None else self.position["workers"]}
+        self.cache_file = cache_file
+        # a SearchStats to report to, or None
+        self.stats = stats
+        self.result = None
+
+    def run(self, output_file="output.txt"):
+        # search the position and write output_file
+        cache = PositionCache(self.cache_file) if self.cache_file else None
+        try:
+            self.result = result = engine.search(self.position["board"], self.position["player"],
+                                                 self.position["depth"], self.position["algorithm"],
+                                                 self.position["row_values"], cache=cache, stats=self.stats,
+                                                 **self.options)
+        finally:
+            if cache is not None:
+                cache.close()
+
+        if result["cached"]:
+            logging.info("position cache hit")
+        for depth, node_count, seconds in result["depth_counts"]:
+            logging.info("depth %d: %d nodes in %.3fs", depth, node_count, seconds)
+        if result["timed_out"]:
+            logging.info("deadline reached, playing the depth %d move", result["depth_counts"][-1][0])
+        for search in result.get("stats", []):
+            logging.info("depth %d: effective branching %s, first move cutoffs %s", search["depth"],
+                         search["branching"], search["first_cutoff_rate"])
+        Minimax.print_nextState(result["move"], result["myopic"], result["farsighted"], result["nodes"],
+                                output_file)
+        return result
+
+
+def play_batch(paths, processes=1, cache_file=None, **options):
+    # answer every input in paths (see engine.batch_inputs), writing
+    # N.out.txt next to each, and print a table of the results; with
+    # instrument=True each result carries its stats
+    files = engine.batch_inputs(paths)
+    positions = (engine.load_position(input_file) for input_file in files)
+    rows = []
+    for input_file, result in zip(files, engine.search_batch(positions, processes, cache_file, **options)):
+        Minimax.print_nextState(result["move"], result["myopic"], result["farsighted"], result["nodes"],
+                                engine.batch_output(input_file))
+        rows.append((input_file, result["move"], result["farsighted"], result["nodes"],
+                     'yes' if result["cached"] else 'no', result["time"], result.get("stats")))
+
+    width = max([len(row[0]) for row in rows] + [5])
+    print('%-*s %-6s %10s %10s %-6s %8s' % (width, 'input', 'move', 'value', 'nodes', 'cached', 'seconds'))
+    for row in rows:
+        print('%-*s %-6s %10s %10d %-6s %8.3f' % ((width,) + row[:6]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Next move of the Star/Circle game')
+    parser.add_argument('input', nargs='?', default='input.txt')
+    parser.add_argument('--batch', metavar='PATH', nargs='+',
+                        help='answer every input*.txt in these directories or the files listed in these '
+                             'manifests, writing N.out.txt next to each input')
+    parser.add_argument('--table-size', type=int, default=TABLE_SIZE, metavar='N',
+                        help='transposition table buckets, e.g. 65536 (default 0: expand every node like '
+                             'the plain search, so node_count matches the assignment)')
+    parser.add_argument('--iterative', action='store_true',
+                        help='ALPHABETA by iterative deepening with principal variation, killer and '
+                             'history move ordering; node counts per depth are logged')
+    parser.add_argument('--time-limit', type=float, default=None, metavar='SECONDS',
+                        help='stop iterative deepening at this deadline and play the deepest finished move')
+    parser.add_argument('--workers', type=int, default=None, metavar='N',
+                        help='split the root moves over N processes (default: the optional last line '
+                             'of the input, else 1); with --batch, search N inputs at a time instead')
+    parser.add_argument('--cache', default=None, metavar='FILE',
+                        help='keep results in FILE across runs and answer repeated positions from it')
+    parser.add_argument('--stats', default=None, metavar='FILE',
+                        help='write per ply node, cutoff and table hit counts and the effective branching '
+                             'factor of every search to FILE as JSON')
+    parser.add_argument('--trace', default=None, metavar='FILE',
+                        help='write sampled expansions to FILE as JSON lines (not with --batch)')
+    parser.add_argument('--trace-sample', type=int, default=1, metavar='N',
+                        help='trace every N-th expansion')
+    args = parser.parse_args()
+    if (args.stats or args.trace) and not args.batch and (args.workers or 1) > 1:
+        parser.error('--stats and --trace need a one process search (--workers 1)')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.batch:
+        rows = play_batch(args.batch, args.workers or 1, args.cache, table_size=args.table_size,
+                          iterative=args.iterative, time_limit=args.time_limit, instrument=bool(args.stats))
+        if args.stats:
+            with open(args.stats, 'w') as f:
+                json.dump([{'input': row[0], 'searches': row[6] or []} for row in rows], f)
+        return
+
+    stats = SearchStats(args.trace, args.trace_sample) if args.stats or args.trace else None
+    try:
+        result = starCircleWar(args.input, args.table_size, args.iterative, args.time_limit, args.workers,
+                               args.cache, stats).run()
+    finally:
+        if stats is not None:
+            stats.close()
+    if args.stats:
+        with open(args.stats, 'w') as f:
+            json.dump({'searches': result.get("stats", [])}, f)
+
+if __name__ == '__main__':
+    main()
@@ -1,188 +1,623 @@
-import copy, datetime
+import os, copy, time, random
 import pprint
+import argparse, json
+import multiprocessing
+from collections import deque, OrderedDict
+from queue import Empty
 
 SUCCESS = 'Yes'
 FAILURE = 'No'
 TernaryConst = 'UEFA'
 TIMELIMIT = 175
-INPUT_FILE_NAME = 'test_cases/50.txt'
+INPUT_FILE_NAME = 'input.txt'
 OUTPUT_FILE_NAME = 'output.txt'
 GRP_PREFIX = 'GROUP'
 
-def search(csp):
-  start_time = datetime.datetime.now()
-  result = backtrack({}, csp['variables'], csp, start_time)
-
-  if result == FAILURE:
-    return result
+class WorldCupCSP(object):
+  # A World Cup draw: `groups` groups to fill with the countries of the
+  # pots, no two countries of one pot or one confederation in the same
+  # group, except UEFA which may have two.  The constraint index (country
+  # numbering, constraints and the constraints of each country) does not
+  # depend on the group count, so with_groups() copies share it.
+
+  def __init__(self, groups, pots, confederations):
+    self.groups = int(groups)
+    self.pots = [list(pot) for pot in pots]
+    self.confederations = dict((name, list(countries)) for name, countries in confederations.items())
+
+    # (countries, limit): at most `limit` of the countries in one group.
+    # Pots and confederations are all-different, except UEFA which may put
+    # two countries in a group.
+    self.constraints = [(pot, 1) for pot in self.pots]
+    for name in sorted(self.confederations):
+      if self.confederations[name]:
+        self.constraints.append((self.confederations[name], 2 if name == TernaryConst else 1))
+
+    self.names = sorted(set(country for pot in self.pots for country in pot))
+    index = dict((c, i) for i, c in enumerate(self.names))
+    self.cons, self.watch = [], [[] for c in self.names]
+    for scope, limit in self.constraints:
+      scope = [index[c] for c in scope if c in index]
+      if len(scope) > limit:
+        for i in scope:
+          self.watch[i].append(len(self.cons))
+        self.cons.append((scope, limit))
+
+  @classmethod
+  def from_file(cls, path):
+    with open(path, 'r') as f:
+      groupNum = f.readline().strip()
+      potNum = int(f.readline().strip())
+      pot = [f.readline().strip().split(",") for i in range(potNum)]
+
+      conf = {}
+      for line in f:
+        a = line.strip().split(":")
+        if len(a) == 2:
+          conf[a[0]] = [] if a[1] == 'None' else a[1].split(",")
+    return cls(groupNum, pot, conf)
+
+  @classmethod
+  def from_dict(cls, draw):
+    # {'groups': n, 'pots': [[country, ...], ...],
+    #  'confederations': {name: [country, ...]}}
+    return cls(draw['groups'], draw['pots'], draw.get('confederations', {}))
+
+  def with_groups(self, groups):
+    # The same draw into another number of groups, sharing the index
+    other = copy.copy(self)
+    other.groups = int(groups)
+    return other
+
+  def group_names(self):
+    return [GRP_PREFIX + str(i+1) for i in range(self.groups)]
+
+  def satisfied(self, assignment):
+    for countries, limit in self.constraints:
+      for grp in self.group_names():
+        if sum(1 for c in countries if assignment.get(c) == grp) > limit:
+          return False
+    return True
+
+  def solve(self, portfolio=0, **options):
+    # Search for a draw; options go to search(), and portfolio=N races N
+    # strategies instead (see run_portfolio).  Returns a dict with
+    #   status : SUCCESS or FAILURE
+    #   groups : group name -> its countries, in group order ({} on FAILURE)
+    #   stats  : the search counters
+    if portfolio:
+      result, stats = run_portfolio(self, portfolio_strategies(portfolio), options)
+    else:
+      result, stats = search(self, **options)
+    if result == FAILURE or not self.satisfied(result):
+      return {'status': FAILURE, 'groups': {}, 'stats': stats}
+
+    groups = OrderedDict((grp, []) for grp in self.group_names())
+    for country in self.names:
+      groups[result[country]].append(country)
+    return {'status': SUCCESS, 'groups': groups, 'stats': stats}
+
+def new_stats():
+  # search counters, returned with every result (and --stats)
+  return {'nodes': 0, 'backtracks': 0,
+          'backjumps': 0, 'skipped': 0, 'nogoods': 0, 'nogood_hits': 0,
+          'restarts': 0, 'propagations': 0, 'max_depth': 0, 'nodes_per_sec': 0,
+          'stopped': None, 'phases': {}}
+# conflict set standing for every decision, so nothing is jumped over
+ALL_LEVELS = -1
+
+def search(csp, lcv='exact', symmetry=True, backjump=True, nogoods=1000, seed=None, restarts=0,
+           budget=None, timing=False):
+  # seed randomizes MRV tie-breaking and the order of equally scored
+  # groups.  restarts is a node cutoff: a run that goes over it starts
+  # again from the top with a fresh tie-breaking and a cutoff half as big
+  # again, keeping what the nogood store learnt.  budget (a Budget,
+  # TIMELIMIT seconds by default) stops the search, which then reports
+  # FAILURE with stats['stopped'] saying which limit ran out.  timing
+  # adds the seconds spent ordering values and propagating to the phases,
+  # at two clock reads per node and per value tried.
+  #
+  # Returns {country: group name} or FAILURE, and the search counters.
+  budget = budget or Budget()
+  budget.start()
+  clock = budget.clock
+  stats = new_stats()
+  phases = stats['phases']
+  start = clock()
+  bits = compile_csp(csp)
+  bits['budget'] = budget
+  bits['stats'] = stats
+  phases['compile'] = clock() - start
+  bits['lcv'] = lcv
+  bits['timing'] = timing
+  bits['backjump'] = backjump
+  bits['nogoods'] = NogoodStore(nogoods, stats)
+  bits['rng'] = random.Random(seed) if seed is not None else None
+  # groups some branch has put a country in; the others are still
+  # interchangeable, so only the first of them is worth trying
+  bits['used'] = 0 if symmetry else (1 << len(bits['groups'])) - 1
+  start = clock()
+  consistent = bool(bits['groups']) and propagate(bits, range(len(bits['cons'])))
+  phases['root'] = clock() - start
+  if not consistent:
+    stats['stopped'] = budget.exceeded
+    return FAILURE, stats
+
+  order = list(range(len(bits['names'])))
+  cutoff = restarts
+  if timing:
+    phases['ordering'] = phases['propagation'] = 0.0
+  start = clock()
+  while True:
+    if bits['rng']:
+      bits['rng'].shuffle(order)
+    bits['cutoff'] = stats['nodes'] + cutoff if cutoff else None
+    bits['cut'] = False
+    result = backtrack(bits, order[:])
+    if result == SUCCESS or not bits['cut']:
+      break
+    stats['restarts'] += 1
+    # at least one more, a cutoff of 1 would never grow by halves
+    cutoff = max(cutoff + 1, cutoff * 3 // 2)
+  phases['search'] = clock() - start
+  stats['nodes_per_sec'] = round(stats['nodes'] / max(phases['search'], 1e-9), 1)
+  for phase in phases:
+    phases[phase] = round(phases[phase], 4)
+  stats['stopped'] = budget.exceeded
+
+  if result != SUCCESS:
+    return FAILURE, stats
+  else:
+    return {bits['names'][i]: bits['groups'][d.bit_length() - 1] for i, d in enumerate(bits['domains'])}, stats
+
+def compile_csp(csp):
+  # Search state for a WorldCupCSP: country i (csp.names), GROUPk as bit
+  # k-1 of a domain mask, and the constraint index built with csp.
+  # Domains are narrowed in place and the old masks pushed on the trail
+  # for undo.
+  #
+  # reason[i] is the bitmask of decision levels (depths in the search)
+  # that the groups missing from domain i follow from, and decisions[l]
+  # the (country, group) chosen at level l; backjumping reads them.
+  groups = csp.group_names()
+  n = len(csp.names)
+  return {'names': csp.names, 'groups': groups, 'cons': csp.cons, 'watch': csp.watch,
+          'domains': [(1 << len(groups)) - 1] * n, 'reason': [0] * n, 'trail': [],
+          'decisions': [], 'decided': {}}
+
+class Budget(object):
+  # Cooperative limits on one search: wall seconds, search nodes and
+  # propagations (filter calls), None for no limit.  Callers count work
+  # with node() and propagation(), which return True once a limit is hit
+  # and stay True; the monotonic clock is only read every `every` calls.
+
+  clock = staticmethod(getattr(time, 'monotonic', time.time))
+
+  def __init__(self, seconds=TIMELIMIT, nodes=None, propagations=None, every=64):
+    self.seconds = seconds
+    self.nodes = nodes
+    self.propagations = propagations
+    self.every = every
+
+  def start(self):
+    self.deadline = self.clock() + self.seconds if self.seconds else None
+    self.node_count = self.propagation_count = 0
+    self.countdown = self.every
+    self.exceeded = None
+
+  def node(self):
+    self.node_count += 1
+    if self.nodes is not None and self.node_count > self.nodes:
+      self.exceeded = self.exceeded or 'nodes'
+    return self.tick()
+
+  def propagation(self):
+    self.propagation_count += 1
+    if self.propagations is not None and self.propagation_count > self.propagations:
+      self.exceeded = self.exceeded or 'propagations'
+    return self.tick()
+
+  def tick(self):
+    self.countdown -= 1
+    if not self.countdown:
+      self.countdown = self.every
+      if self.deadline is not None and self.clock() > self.deadline:
+        self.exceeded = self.exceeded or 'time'
+    return self.exceeded is not None
+
+def backtrack(bits, unassigned):
+  # Conflict-directed backjumping.  A failed subtree returns its conflict
+  # set, the decision levels its failure follows from; when the level of
+  # this node is not in it, trying this node's other groups cannot help
+  # and the failure is passed straight up.  Returns SUCCESS or the set.
+  stats = bits['stats']
+  stats['nodes'] += 1
+  budget = bits['budget']
+  if budget.node():
+    return ALL_LEVELS
+  if bits['cutoff'] and stats['nodes'] > bits['cutoff']:
+    bits['cut'] = True
+    return ALL_LEVELS
+
+  if not unassigned:
+    return SUCCESS
+  var = select_unassigned_variable(bits, unassigned)
+  pos = unassigned.index(var)
+  del unassigned[pos]
+  level = len(bits['decisions'])
+  stats['max_depth'] = max(stats['max_depth'], level)
+  timing = bits['timing']
+  if timing:
+    clock, phases = budget.clock, stats['phases']
+    start = clock()
+  values = ordering_values(bits, var, unassigned)
+  if timing:
+    phases['ordering'] += clock() - start
+
+  trail, used, decided = bits['trail'], bits['used'], bits['decided']
+  conflict = 0
+  for n, value in enumerate(values):
+    mark = len(trail)
+    bits['used'] = used | value
+    bits['decisions'].append((var, value))
+    decided[var] = (value, level)
+    why = bits['nogoods'].conflict(var, value, decided)
+    if why is None:
+      if timing:
+        start = clock()
+      consistent = assign(bits, var, value, level)
+      if timing:
+        phases['propagation'] += clock() - start
+      if consistent:
+        why = backtrack(bits, unassigned)
+        if why == SUCCESS:
+          return why
+      else:
+        why = bits['conflict']
+    stats['backtracks'] += 1
+    undo(bits, mark)
+    del decided[var]
+    bits['decisions'].pop()
+    if budget.exceeded:
+      conflict = ALL_LEVELS
+      break
+    if not bits['backjump']:
+      why = ALL_LEVELS
+    if not why >> level & 1:
+      # this node's choice is not to blame: jump back past it
+      stats['backjumps'] += 1
+      stats['skipped'] += len(values) - n - 1
+      conflict = why
+      break
+    conflict |= why & ~(1 << level)
   else:
-    return {i: v[0] for i, v in result.iteritems()}
-
-def backtrack(assignments, unassigned, csp, start_time):
-  # time elapse check
-  time_elapsed = datetime.datetime.now() - start_time
-  if time_elapsed.seconds > TIMELIMIT:  # time limit : 180 sec
-    return FAILURE
-
-  if chkFinished(unassigned):
-    return assignments
-  var = select_unassigned_variable(unassigned)
-  values = ordering_values(var, assignments, unassigned, csp)
-  del unassigned[var]
-
-  for value in values:
-    assignments[var] = [value]
-    legal_v = enforce_consistency(assignments, unassigned, csp)
-    if chkEmpty(legal_v):
-      continue  # A variable has no legal values.
-    unassign = {}
-    for var, val in legal_v.iteritems():
-      if var not in assignments:
-        unassign.update({var: val})
-    result = backtrack(assignments.copy(), unassign, csp, start_time)
-    if result != FAILURE:
-      return result
-
-  return FAILURE
-
-def chkFinished(unassigned):
-  return len(unassigned) == 0
-
-def chkEmpty(v):
-  return any((len(values) == 0 for values in v.itervalues()))
-
-def partial_assignment(assignments, unassigned):
-  v = unassigned.copy()
-  v.update(assignments)
-  return v
-
-def enforce_consistency(assignments, unassigned, csp):
-  def remove_inconsistent_values(x, y, constraint, variables):
-    #valid_tail_values = [t for t in variables[tail] if any((constraint(h, t) for h in variables[head]))]
-    valid_tail_values = []
-    for t in variables[y]:
-      if any((constraint(h, t) for h in variables[x])):
-        valid_tail_values.append(t)
-    removed = len(variables[y]) != len(valid_tail_values)
-    variables[y] = valid_tail_values
-    return removed
-
-  def recheck_constraints(node):
-    new_csp = []
-    for h, t, c in csp['constraints']:
-      if h == node:
-        new_csp.append((h,t,c))
-
-    return new_csp
-
-  const_queue, variables = csp['constraints'][:], partial_assignment(assignments, unassigned)
-  while len(const_queue):
-    x, y, constraint = const_queue.pop(0)
-
-    if remove_inconsistent_values(x, y, constraint, variables):
-      const_queue.extend(recheck_constraints(y))  # RECHECK
-  return variables
-
-def select_unassigned_variable(unassigned):
+    # out of groups: the ones propagation removed are to blame as well
+    conflict |= bits['reason'][var]
+    if conflict >= 0:
+      bits['nogoods'].add([bits['decisions'][l] for l in range(level) if conflict >> l & 1])
+
+  bits['used'] = used
+  unassigned.insert(pos, var)
+  return conflict
+
+class NogoodStore(object):
+  # Sets of decisions known to have no solution, learnt from exhausted
+  # nodes; at most `size` of them, the least recently used dropped first.
+  # Each is filed under all of its (country, group) pairs, so a decision
+  # only has to check the nogoods it appears in.
+
+  def __init__(self, size, stats):
+    self.size = size
+    self.stats = stats
+    self.nogoods = OrderedDict()
+    self.index = {}
+
+  def add(self, nogood):
+    nogood = tuple(sorted(nogood))
+    if not self.size or not nogood or nogood in self.nogoods:
+      return
+    if len(self.nogoods) >= self.size:
+      old, x = self.nogoods.popitem(last=False)
+      for pair in old:
+        self.index[pair].remove(old)
+    self.nogoods[nogood] = None
+    for pair in nogood:
+      self.index.setdefault(pair, []).append(nogood)
+    self.stats['nogoods'] += 1
+
+  def conflict(self, var, value, decided):
+    # The levels of a stored nogood that the decisions in force, with
+    # var = value, complete; None if there is none.
+    for nogood in self.index.get((var, value), ()):
+      why = 0
+      for x, g in nogood:
+        if x not in decided or decided[x][0] != g:
+          break
+        why |= 1 << decided[x][1]
+      else:
+        del self.nogoods[nogood]
+        self.nogoods[nogood] = None
+        self.stats['nogood_hits'] += 1
+        return why
+    return None
+
+def popcount(d):
+  return bin(d).count('1')
+
+def ones(d):
+  # group numbers (bit positions) set in domain d
+  return [g for g in range(d.bit_length()) if d >> g & 1]
+
+def assign(bits, var, value, level):
+  # Narrow var to the single group bit `value`, chosen at decision level
+  # `level`, and propagate
+  domains, reason = bits['domains'], bits['reason']
+  bits['trail'].append((var, domains[var], reason[var]))
+  if domains[var] != value:
+    reason[var] |= 1 << level
+  domains[var] = value
+  return propagate(bits, bits['watch'][var])
+
+def propagate(bits, queue):
+  # Filter the queued constraints, requeueing the other constraints of
+  # every country that lost a group, until nothing changes.  False when
+  # a constraint cannot be met, with its conflict set in bits['conflict'].
+  cons, watch = bits['cons'], bits['watch']
+  budget = bits['budget']
+  queue = deque(queue)
+  queued = set(queue)
+  while queue:
+    c = queue.popleft()
+    queued.discard(c)
+    bits['stats']['propagations'] += 1
+    if budget.propagation():
+      bits['conflict'] = ALL_LEVELS
+      return False
+    changed = filter_limit(bits, cons[c][0], cons[c][1])
+    if changed is None:
+      reason = bits['reason']
+      bits['conflict'] = 0
+      for y in cons[c][0]:
+        bits['conflict'] |= reason[y]
+      return False
+    # one filtering pass leaves its own constraint consistent
+    for x in changed:
+      for c2 in watch[x]:
+        if c2 != c and c2 not in queued:
+          queued.add(c2)
+          queue.append(c2)
+  return True
+
+def filter_limit(bits, scope, limit):
+  # Regin's matching filter for "at most `limit` countries of scope per
+  # group" (all-different when limit is 1, UEFA's cardinality rule with 2).
+  # Countries are matched to groups, a group taking up to `limit` of them;
+  # a group stays in a country's domain only if some maximum matching
+  # uses it: it is matched there, or it sits on an alternating cycle (same
+  # strongly connected component) or on an alternating path from a group
+  # with room left.  Returns the countries whose domain shrank, or None
+  # when not every country can be matched.
+  domains, trail = bits['domains'], bits['trail']
+  k = len(scope)
+  doms = [ones(domains[x]) for x in scope]
+  mate = [-1] * k
+  owner = {}
+
+  def augment(i, seen):
+    for g in doms[i]:
+      if g not in seen:
+        seen.add(g)
+        taken = owner.setdefault(g, [])
+        if len(taken) < limit:
+          taken.append(i)
+          mate[i] = g
+          return True
+        for n, j in enumerate(taken):
+          if augment(j, seen):
+            taken[n] = i
+            mate[i] = g
+            return True
+    return False
+
+  for i in range(k):
+    if not augment(i, set()):
+      return None
+
+  # residual graph: country i -> its matched group, group g -> every
+  # other country that could take g.  Nodes 0..k-1 are countries and
+  # k+g groups.
+  groups = set(g for d in doms for g in d)
+  edges = dict((i, [k + mate[i]]) for i in range(k))
+  for g in groups:
+    edges[k + g] = [i for i in range(k) if g in doms[i] and mate[i] != g]
+
+  # groups reachable from one with room left
+  reach = set()
+  stack = [k + g for g in groups if len(owner.get(g, ())) < limit]
+  while stack:
+    v = stack.pop()
+    if v not in reach:
+      reach.add(v)
+      stack.extend(edges[v])
+
+  comp = scc(edges)
+  # what the removals follow from: everything scope's domains already do
+  reason = bits['reason']
+  why = 0
+  for x in scope:
+    why |= reason[x]
+  changed = []
+  for i in range(k):
+    x = scope[i]
+    d = domains[x]
+    for g in doms[i]:
+      if g != mate[i] and k + g not in reach and comp[i] != comp[k + g]:
+        d &= ~(1 << g)
+    if d != domains[x]:
+      trail.append((x, domains[x], reason[x]))
+      domains[x] = d
+      reason[x] |= why
+      changed.append(x)
+  return changed
+
+def scc(edges):
+  # Tarjan's strongly connected components of {node: [successors]};
+  # returns node -> component number
+  index, low, comp = {}, {}, {}
+  stack, onstack = [], set()
+
+  def visit(v):
+    index[v] = low[v] = len(index)
+    stack.append(v)
+    onstack.add(v)
+    for w in edges[v]:
+      if w not in index:
+        visit(w)
+        low[v] = min(low[v], low[w])
+      elif w in onstack:
+        low[v] = min(low[v], index[w])
+    if low[v] == index[v]:
+      while True:
+        w = stack.pop()
+        onstack.discard(w)
+        comp[w] = v
+        if w == v:
+          break
+
+  for v in edges:
+    if v not in index:
+      visit(v)
+  return comp
+
+def undo(bits, mark):
+  domains, reason, trail = bits['domains'], bits['reason'], bits['trail']
+  while len(trail) > mark:
+    var, domains[var], reason[var] = trail.pop()
+
+def select_unassigned_variable(bits, unassigned):
   # Select Most Constrained Variable from unassigned variables
-  return min(unassigned.keys(), key=lambda k: len(unassigned[k]))
-
-def ordering_values(var, assignments, unassigned, csp):
-
-  def countingVal(vars):
-    return sum((len(vars[v]) for v in unassigned if v != var))
-
-  def eliminatingVal(val):
-    assignments[var] = [val]
-    new_vals = countingVal(enforce_consistency(assignments, unassigned, csp))
-    del assignments[var]
+  domains = bits['domains']
+  return min(unassigned, key=lambda i: popcount(domains[i]))
+
+def candidate_values(bits, var):
+  # Value symmetry breaking: groups in use plus the lowest unused one.
+  # Constraints treat all groups alike, so with the unused groups still
+  # interchangeable in every domain any of them leads to the same subtree
+  # up to renaming.
+  d = bits['domains'][var]
+  fresh = d & ~bits['used']
+  return [1 << g for g in ones((d & bits['used']) | (fresh & -fresh))]
+
+def ordering_values(bits, var, unassigned):
+  domains = bits['domains']
+  values = candidate_values(bits, var)
+  if bits['rng']:
+    # the sorts below are stable: ties keep this random order
+    bits['rng'].shuffle(values)
+  if bits['lcv'] == 'neighbours':
+    removed = removed_values(bits, var)
+    return sorted(values, key=lambda value: removed[value])
+
+  def eliminatingVal(value):
+    mark = len(bits['trail'])
+    if assign(bits, var, value, len(bits['decisions'])):
+      new_vals = sum(popcount(domains[i]) for i in unassigned)
+    else:
+      new_vals = -1
+    undo(bits, mark)
     return new_vals
 
   # Orders an unassigned variable according to the Least Constraining Value
-  return sorted(unassigned[var], key=eliminatingVal, reverse=True)
-
-
-with open(INPUT_FILE_NAME, 'r') as f:
-  groupNum = f.readline().strip()
-  potNum = int(f.readline().strip())
-  pot = {}
-  for i in range(potNum):
-    pot[i] = f.readline().strip().split(",")
-
-  conf = {}
-  for line in f:
-    a = line.strip().split(":")
-    conf[a[0]] = a[1].split(",")
-
-  constraints = {}
-  tmpPot = []
-  for j in range(potNum):
-    for k in range(len(pot[j])):
-      key = pot[j][k]
-      cons = list()
-      for i in range(len(pot[j])):
-        if(key != pot[j][i]):
-          cons.append(pot[j][i])
-      constraints[key] = cons
-
-  UEFA = list()
-  for i in conf.keys():
-    if conf[i][0] != 'None' and i != TernaryConst:
-      for k in conf[i]:
-        constraints[k] = list(set(constraints[k]+conf[i]))
-        constraints[k].remove(k)
-
-  setUEFA = {}
-  for country in constraints.keys():
-    grpUEFA = copy.copy(conf[TernaryConst])
-    if country in conf[TernaryConst]:
-      grpUEFA.remove(country)
-      for i in constraints[country]:
-        if i in conf[TernaryConst]:
-          grpUEFA.remove(i)
-      setUEFA.update({country : grpUEFA})
-
-  #print setUEFA
-
-  matchUEFA = {}
-  for i in setUEFA.keys():
-    for j in setUEFA[i]:
-      if i in setUEFA[j]:
-        if i not in matchUEFA and j not in matchUEFA:
-          #if len(matchUEFA)<=(int(groupNum)-1):
-            matchUEFA.update({i:j})
-            matchUEFA.update({j:i})
-
-  #print str(len(matchUEFA))
-  #print str(matchUEFA)
-
-  unmatch = {}
-
-  for i in matchUEFA.keys():
-    grpmatchUEFA = copy.copy(conf[TernaryConst])
-    grpmatchUEFA.remove(i)
-    grpmatchUEFA.remove(matchUEFA[i])
-    unmatch.update({i:grpmatchUEFA})
-
-  #print "unmatch:" + str(unmatch)
-
-  for country in constraints:
-    if country in unmatch:
-        constraints[country] = list(set(constraints[country]+unmatch[country]))
-
-#print "constraints : " + str(constraints)
-
-grpList = [GRP_PREFIX + str(i+1) for i in range(int(groupNum))]
-
-def diff(i,j):
-  return i != j
-
-wc = {}
-wc['variables'] = {country:grpList for country in constraints.keys()}
-wc['constraints'] = [(s1, s2, diff) for s1 in constraints.keys() for s2 in constraints[s1]]
-
-def print_output(status, outputResult):
-  wfile = open(OUTPUT_FILE_NAME, "w")
+  return sorted(values, key=eliminatingVal, reverse=True)
+
+def removed_values(bits, var):
+  # Cheap LCV score: for each group of var, how many values taking it
+  # directly removes from the countries sharing a constraint with var,
+  # without propagating further.
+  domains, cons = bits['domains'], bits['cons']
+  scopes = [cons[c] for c in bits['watch'][var]]
+  values = [1 << g for g in ones(domains[var])]
+  removed = dict((value, 0) for value in values)
+  for scope, limit in scopes:
+    # countries already down to one group, per group
+    fixed = {}
+    for y in scope:
+      if y != var and popcount(domains[y]) == 1:
+        fixed[domains[y]] = fixed.get(domains[y], 0) + 1
+    for value in values:
+      # the group fills up only once limit-1 others are already in it
+      if fixed.get(value, 0) + 1 >= limit:
+        removed[value] += sum(1 for y in scope if y != var and domains[y] & value and domains[y] != value)
+  return removed
+
+def portfolio_strategies(count):
+  # The deterministic search first, then seeded ones with restarts,
+  # alternating the value ordering
+  strategies = [{'name': 'default'}]
+  for n in range(1, count):
+    lcv = ['neighbours', 'exact'][n % 2]
+    strategies.append({'name': 'seed%d-%s' % (n, lcv), 'lcv': lcv, 'seed': n,
+                       'restarts': 100 * n})
+  return strategies
+
+def portfolio_worker(csp, strategy, options, queue):
+  options = dict(options)
+  options.update((k, v) for k, v in strategy.items() if k != 'name')
+  start = time.time()
+  result, stats = search(csp, **options)
+  if result != FAILURE:
+    status = 'solved'
+  elif stats['stopped']:
+    status = 'stopped'
+  else:
+    status = 'infeasible'
+  queue.put((strategy['name'], status, result, time.time() - start, stats))
+
+def run_portfolio(csp, strategies, options):
+  # Race the strategies in one process each.  The first to solve the draw
+  # or prove it infeasible wins and the rest are cancelled; running out
+  # of budget is no proof, so the race goes on without that one.  Returns
+  # the winning result, its counters and a report entry per strategy (the
+  # last stopped run's counters when every strategy runs out).  A process
+  # that dies without posting (an exception, the OOM killer, a result
+  # that fails to pickle) is reported as failed.
+  queue = multiprocessing.Queue()
+  procs = dict((s['name'], multiprocessing.Process(target=portfolio_worker, args=(csp, s, options, queue)))
+               for s in strategies)
+  start = time.time()
+  for p in procs.values():
+    p.start()
+
+  report, result, stats = {}, FAILURE, new_stats()
+  while len(report) < len(procs):
+    # whatever a process found dead here had posted is readable by now
+    dead = [name for name, p in procs.items() if name not in report and p.exitcode is not None]
+    try:
+      name, status, found, elapsed, found_stats = queue.get(timeout=0.1)
+    except Empty:
+      for name in dead:
+        report[name] = {'strategy': name, 'status': 'failed', 'exitcode': procs[name].exitcode,
+                        'seconds': round(time.time() - start, 3)}
+        # nothing proven yet, so no clean No either
+        stats['stopped'] = stats['stopped'] or 'failed'
+      continue
+    report[name] = {'strategy': name, 'status': status, 'seconds': round(elapsed, 3),
+                    'nodes': found_stats['nodes'], 'restarts': found_stats['restarts']}
+    # a stopped run's counters stand until one proves something, so a race
+    # lost to the budget reports stats['stopped'] rather than a clean No
+    result, stats = found, found_stats
+    if status != 'stopped':
+      break
+  for name, p in procs.items():
+    if name not in report:
+      p.terminate()
+      report[name] = {'strategy': name, 'status': 'cancelled',
+                      'seconds': round(time.time() - start, 3)}
+    p.join()
+  stats['portfolio'] = [report[s['name']] for s in strategies]
+  return result, stats
+
+def print_output(status, outputResult, file_name=OUTPUT_FILE_NAME):
   output = status + "\n"
   for grp in outputResult.keys():
     for grpElement in range(len(outputResult[grp])):
@@ -190,21 +625,94 @@ def print_output(status, outputResult):
         output+=str(outputResult[grp][grpElement])+ ","
       else:
         output+=str(outputResult[grp][grpElement])+ "\n"
-  wfile.write(output)
-
-result = search(wc)
-#print result
-status = SUCCESS
-
-if result == FAILURE or not all((result[s1] != result[s2] for s1 in constraints.keys() for s2 in constraints[s1])):
-  status = FAILURE
-  print_output(status, {})
-else:
-  outputResult = {}
-
-  for i in grpList:
-    outputResult.update({i:[]})
-  for i in result.keys():
-    outputResult[result[i]].append(i)
-
-  print_output(status, outputResult)
+  with open(file_name, "w") as wfile:
+    wfile.write(output)
+
+def batch_inputs(paths):
+  # Input files named by paths: a directory stands for its .txt files
+  # (not outputN.txt or earlier .out.txt results), any other file is a
+  # manifest listing inputs one per line (relative to the manifest).
+  files = []
+  for path in paths:
+    if os.path.isdir(path):
+      names = [n for n in sorted(os.listdir(path))
+               if n.endswith('.txt') and not n.startswith('output') and not n.endswith('.out.txt')]
+      files.extend(os.path.join(path, n) for n in names)
+    else:
+      base = os.path.dirname(path)
+      with open(path) as f:
+        files.extend(os.path.join(base, line.strip()) for line in f
+                     if line.strip() and not line.startswith('#'))
+  return files
+
+def batch_output(input_file):
+  # N.txt -> N.out.txt, leaving the expected outputN.txt files alone
+  root, ext = os.path.splitext(input_file)
+  return root + '.out' + ext
+
+def solve_batch(paths, portfolio=0, **options):
+  # Solve many draws in this one process, writing N.out.txt next to each
+  # input.  A draw that differs from an earlier one only in its group
+  # count reuses that one's constraint index.
+  rows, models = [], {}
+  for input_file in batch_inputs(paths):
+    start = time.time()
+    csp = WorldCupCSP.from_file(input_file)
+    key = (tuple(map(tuple, csp.pots)), tuple(sorted((k, tuple(v)) for k, v in csp.confederations.items())))
+    reused = key in models
+    if reused:
+      csp = models[key].with_groups(csp.groups)
+    else:
+      models[key] = csp
+    result = csp.solve(portfolio=portfolio, **options)
+    print_output(result['status'], result['groups'], batch_output(input_file))
+    rows.append((input_file, result['status'], result['stats']['nodes'],
+                 'yes' if reused else 'no', time.time() - start))
+
+  width = max([len(row[0]) for row in rows] + [5])
+  print('%-*s %-6s %8s %-7s %8s' % (width, 'input', 'status', 'nodes', 'reused', 'seconds'))
+  for row in rows:
+    print('%-*s %-6s %8d %-7s %8.3f' % ((width,) + row))
+  return rows
+
+def main():
+  parser = argparse.ArgumentParser(description='Assign World Cup countries to groups')
+  parser.add_argument('input', nargs='?', default=INPUT_FILE_NAME)
+  parser.add_argument('--batch', metavar='PATH', nargs='+',
+                      help='solve every draw in these directories or the files listed in these '
+                           'manifests, writing N.out.txt next to each input')
+  parser.add_argument('--stats', metavar='FILE', default=None,
+                      help='write search counters, with seconds per phase, to FILE as JSON')
+  parser.add_argument('--no-symmetry', dest='symmetry', action='store_false',
+                      help='try every group for a country, not just the used ones and one fresh')
+  parser.add_argument('--no-backjump', dest='backjump', action='store_false',
+                      help='backtrack chronologically instead of jumping to the culprit level')
+  parser.add_argument('--nogoods', type=int, default=1000, metavar='N',
+                      help='learnt nogoods kept (least recently used dropped), 0 for none')
+  parser.add_argument('--portfolio', type=int, default=0, metavar='N',
+                      help='race N differently seeded and ordered searches in parallel processes')
+  parser.add_argument('--time-limit', type=float, default=TIMELIMIT, metavar='SECONDS')
+  parser.add_argument('--node-budget', type=int, default=None, metavar='N')
+  parser.add_argument('--propagation-budget', type=int, default=None, metavar='N')
+  parser.add_argument('--lcv', choices=['exact', 'neighbours'], default='exact',
+                      help='value ordering: exact propagates every candidate group, '
+                           'neighbours counts the groups it removes next to the variable')
+  args = parser.parse_args()
+
+  options = {'lcv': args.lcv, 'symmetry': args.symmetry, 'backjump': args.backjump,
+             'nogoods': args.nogoods, 'portfolio': args.portfolio, 'timing': bool(args.stats),
+             'budget': Budget(args.time_limit, args.node_budget, args.propagation_budget)}
+  if args.batch:
+    solve_batch(args.batch, **options)
+    return
+
+  result = WorldCupCSP.from_file(args.input).solve(**options)
+  for entry in result['stats'].get('portfolio', []):
+    print('%-20s %-10s %8.3fs' % (entry['strategy'], entry['status'], entry['seconds']))
+  print_output(result['status'], result['groups'])
+  if args.stats:
+    with open(args.stats, 'w') as f:
+      json.dump(result['stats'], f)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,61 @@
+"""
+Scaling benchmark for the parallel GridWorld value iteration
+
+Builds a random grid (walls, a few terminals), then times
+value_iteration_np and value_iteration_parallel with 1..N workers and
+prints the speedup of each worker count over one worker.
+
+usage : python benchmark.py --rows 2000 --cols 2000 --workers 8
+"""
+
+import argparse
+import random
+import time
+
+from hw3cs561s2018 import GridMDP, GridArrays, value_iteration_np, value_iteration_parallel
+
+
+def random_grid(rows, cols, walls=0.1, terminals=4, reward=(-0.04, -0.04), seed=0):
+    """Grid in getInputs' layout (top row first) and its terminal states."""
+    rng = random.Random(seed)
+    grid = [[None if rng.random() < walls else list(reward) for x in range(cols)]
+            for y in range(rows)]
+    cells = []
+    for t in range(terminals):
+        y, x = rng.randrange(rows), rng.randrange(cols)
+        r = rng.choice([-1.0, 1.0]) * rng.uniform(1, 100)
+        grid[y][x] = [r, r]
+        cells.append((x, rows - 1 - y))
+    return grid, cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--cols', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--gamma', type=float, default=0.9)
+    args = parser.parse_args()
+
+    grid, terminals = random_grid(args.rows, args.cols)
+    mdp = GridMDP(grid, 0.8, 0.6, terminals=terminals, gamma=args.gamma, lazy=True)
+    start = time.time()
+    arrays = GridArrays(mdp)
+    print("states: %d  compile: %.2fs" % (len(arrays.order), time.time() - start))
+
+    stats = {}
+    start = time.time()
+    value_iteration_np(mdp, arrays=arrays, stats=stats)
+    print("value_iteration_np: %.2fs  sweeps: %d" % (time.time() - start, stats['sweeps']))
+
+    base = None
+    for workers in range(1, args.workers + 1):
+        start = time.time()
+        value_iteration_parallel(mdp, workers, arrays=arrays)
+        elapsed = time.time() - start
+        base = base or elapsed
+        print("workers: %2d  %.2fs  speedup: %.2fx" % (workers, elapsed, base / elapsed))
+
+
+if __name__ == '__main__':
+    main()
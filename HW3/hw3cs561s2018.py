@@ -1,6 +1,20 @@
+import os
+import copy
+import glob
+import time
 import random
+import hashlib
 import itertools
 import operator
+import json
+import warnings
+import argparse
+import multiprocessing
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 argmin = min
 argmax = max
@@ -12,6 +26,9 @@ def vector_add(a, b):
 orientations = EAST, RUN_EAST, NORTH, RUN_NORTH, WEST, RUN_WEST, SOUTH, RUN_SOUTH = [(1, 0), (2, 0), (0, 1), (0, 2), (-1, 0), (-2, 0), (0, -1), (0, -2)]
 turns = LEFT, RIGHT, RUN, WALK = (+2, -2, +1, -1)
 
+ARROWS = {(1, 0): 'Walk Right',(2, 0): 'Run Right', (0, 1): 'Walk Up', (0, 2): 'Run Up',
+          (-1, 0): 'Walk Left', (-2, 0): 'Run Left', (0, -1): 'Walk Down', (0, -2): 'Run Down',None: 'Exit'}
+
 def turn_heading(heading, inc, headings=orientations):
     return headings[(headings.index(heading) + inc) % len(headings)]
 
@@ -93,11 +110,33 @@ class MDP:
             print('Could not retrieve states from transitions')
             return None
 
+class LazyTransitions(dict):
+    """GridMDP transition table that builds a state's entry on first use.
+
+    Solvers that work on GridArrays never touch it, so large maps skip the
+    per-state lists of (p, state) tuples entirely."""
+
+    def __init__(self, mdp):
+        dict.__init__(self)
+        self.mdp = mdp
+
+    def __missing__(self, s):
+        mdp = self.mdp
+        self[s] = {a: mdp.calculate_T(s, a, mdp.Pr_walk, mdp.Pr_run) for a in mdp.actlist}
+        return self[s]
+
+    def __bool__(self):
+        return True
+    __nonzero__ = __bool__
+
+
 class GridMDP(MDP):
-    def __init__(self, grid, Pr_walk, Pr_run, terminals, gamma, init=(0, 0)):
+    def __init__(self, grid, Pr_walk, Pr_run, terminals, gamma, init=(0, 0), lazy=False):
         grid.reverse()  # sbecause we want row 0 on bottom, not on top
         reward = {}
         states = set()
+        self.Pr_walk = Pr_walk
+        self.Pr_run = Pr_run
         self.rows = len(grid)
         self.cols = len(grid[0])
         self.grid = grid
@@ -108,11 +147,15 @@ class GridMDP(MDP):
                     reward[(x, y)] = grid[y][x]
         self.states = states
         actlist = orientations
-        transitions = {}
-        for s in states:
-            transitions[s] = {}
-            for a in actlist:
-                transitions[s][a] = self.calculate_T(s, a, Pr_walk, Pr_run)
+        if lazy:
+            self.actlist = actlist
+            transitions = LazyTransitions(self)
+        else:
+            transitions = {}
+            for s in states:
+                transitions[s] = {}
+                for a in actlist:
+                    transitions[s][a] = self.calculate_T(s, a, Pr_walk, Pr_run)
         MDP.__init__(self, init, actlist=actlist,
                      terminals=terminals, transitions=transitions,
                      reward=reward, states=states, gamma=gamma)
@@ -151,32 +194,20 @@ class GridMDP(MDP):
                               for y in range(self.rows)]))
 
     def to_arrows(self, policy):
-        chars = {(1, 0): 'Walk Right',(2, 0): 'Run Right', (0, 1): 'Walk Up', (0, 2): 'Run Up',
-                 (-1, 0): 'Walk Left', (-2, 0): 'Run Left', (0, -1): 'Walk Down', (0, -2): 'Run Down',None: 'Exit'}
-        return self.to_grid({s: chars[a] for (s, a) in policy.items()})
+        return self.to_grid({s: ARROWS[a] for (s, a) in policy.items()})
 
-def value_iteration(mdp, epsilon=0.1):
+def value_iteration(mdp, epsilon=0.1, stats=None):
     U1 = {s: 0 for s in mdp.states}
-    R, T, gamma = mdp.R, mdp.T, mdp.gamma
+    gamma = mdp.gamma
     epsilon_counter = 0
     prev_delta = 0
+    sweeps = 0
     while True:
         U = U1.copy()
         delta = 0
+        sweeps += 1
         for s in mdp.states:
-            tmpSum_walk = [sum(p * U[s1] for (p, s1) in T(s, a)) for a in mdp.actions(s) if check_run(a) == 0]
-            tmpSum_run = [sum(p * U[s1] for (p, s1) in T(s, a)) for a in mdp.actions(s) if check_run(a) == 1]
-            tmpSum = list(itertools.chain.from_iterable([tmpSum_walk,tmpSum_run]))
-
-            tmpMax = max(tmpSum)
-            idxMax = tmpSum.index(tmpMax)
-
-            if idxMax < 4:
-                tmpReward = R(s)[1]
-            else:
-                tmpReward = R(s)[0]
-
-            U1[s] = tmpReward + gamma * tmpMax
+            U1[s] = bellman_update(mdp, U, s)
 
             # U1[s] = gamma * max(sum(p * U[s1] for (p, s1) in T(s, a)) for a in mdp.actions(s))
             delta = max(delta, abs(U1[s] - U[s]))
@@ -189,9 +220,37 @@ def value_iteration(mdp, epsilon=0.1):
             epsilon_counter+=1
 
         if delta < epsilon * (1 - gamma) / gamma or epsilon_counter > 10:
+            if stats is not None:
+                stats['sweeps'] = sweeps
             return U
         prev_delta = delta
 
+def bellman_update(mdp, U, s):
+    """New utility of s from U: best expected utility over the walks, then
+    the runs, plus R(s)[1] if a walk won or R(s)[0] if a run did."""
+    R, T, gamma = mdp.R, mdp.T, mdp.gamma
+    tmpSum_walk = [sum(p * U[s1] for (p, s1) in T(s, a)) for a in mdp.actions(s) if check_run(a) == 0]
+    tmpSum_run = [sum(p * U[s1] for (p, s1) in T(s, a)) for a in mdp.actions(s) if check_run(a) == 1]
+    tmpSum = list(itertools.chain.from_iterable([tmpSum_walk,tmpSum_run]))
+
+    tmpMax = max(tmpSum)
+    idxMax = tmpSum.index(tmpMax)
+
+    if idxMax < 4:
+        tmpReward = R(s)[1]
+    else:
+        tmpReward = R(s)[0]
+
+    return tmpReward + gamma * tmpMax
+
+
+def bellman_action(mdp, U, s):
+    """The action bellman_update backs s up with: the first walk, then
+    run, of highest expected utility (None on a terminal)."""
+    acts = [a for a in mdp.actions(s) if check_run(a) == 0] + [a for a in mdp.actions(s) if check_run(a) == 1]
+    return argmax(acts, key=lambda a: expected_utility(a, s, U, mdp))
+
+
 def check_run(action):
     if action == None:
         return 0;
@@ -212,87 +271,1015 @@ def best_policy(mdp, U):
 def expected_utility(a, s, U, mdp):
     return sum(p * U[s1] for (p, s1) in mdp.T(s, a))
 
+
+def policy_evaluation(pi, U, mdp, k=20, threshold=0, stats=None):
+    """Up to k in-place sweeps of U(s) = R + gamma * sum(p * U(s1)) under
+    pi, stopping early once a sweep moves U by less than threshold.
+
+    The reward follows value_iteration: R(s)[1] for a walk (or Exit),
+    R(s)[0] for a run."""
+    R, T, gamma = mdp.R, mdp.T, mdp.gamma
+    delta = 0
+    for i in range(k):
+        delta = 0
+        for s in mdp.states:
+            u = (R(s)[0] if check_run(pi[s]) else R(s)[1]) + gamma * sum(p * U[s1] for (p, s1) in T(s, pi[s]))
+            delta = max(delta, abs(u - U[s]))
+            U[s] = u
+        if stats is not None:
+            stats['sweeps'] = stats.get('sweeps', 0) + 1
+        if delta < threshold:
+            break
+    return U, delta
+
+
+def policy_iteration(mdp, k=20, epsilon=0.1, stats=None):
+    """Modified policy iteration: up to k evaluation sweeps per improvement.
+
+    Improvement follows bellman_update: each state takes the first action,
+    walks before runs, with the highest expected_utility, so a stable policy
+    with its evaluated U is a fixed point of value_iteration's backup.  Stops
+    once the policy is stable and the last evaluation sweep moved U by less
+    than value_iteration's epsilon bound.  As in value_iteration, a stall
+    counter ends the search after more than 10 rounds that changed no fewer
+    actions than the best round so far: the bound is 0 when gamma is 1, and
+    where the walk/run reward switch has no fixed point (sample input2)
+    states flip between a walk and a run forever, value_iteration included.
+
+    Returns U like value_iteration, for best_policy and to_arrows."""
+    U = {s: 0 for s in mdp.states}
+    pi = {s: mdp.actions(s)[0] for s in mdp.states}
+    gamma = mdp.gamma
+    threshold = epsilon * (1 - gamma) / gamma
+    counts = {'sweeps': 0}
+    epsilon_counter = 0
+    fewest = len(pi) + 1
+    iterations = 0
+    while True:
+        iterations += 1
+        U, delta = policy_evaluation(pi, U, mdp, k, threshold, counts)
+        changed = 0
+        for s in mdp.states:
+            a = bellman_action(mdp, U, s)
+            if a != pi[s]:
+                pi[s] = a
+                changed += 1
+
+        # value_iteration's stall rule, on the number of actions changed
+        if changed >= fewest:
+            epsilon_counter+=1
+        fewest = min(fewest, changed)
+
+        if (changed == 0 and delta < threshold) or epsilon_counter > 10:
+            if stats is not None:
+                stats['iterations'] = iterations
+                stats['sweeps'] = counts['sweeps']
+            return U
+
+
+def grid_key(mask, Pr_walk, Pr_run, terminals):
+    """Hash of everything the transition model depends on: the open-cell
+    mask, Pr_walk/Pr_run and the terminal cells.
+
+    Rewards and gamma are left out on purpose: re-solving a map with new
+    rewards or discount reuses the compiled model.
+    """
+    h = hashlib.sha1()
+    h.update(repr((mask.shape, Pr_walk, Pr_run, sorted(terminals))).encode())
+    h.update(np.packbits(mask).tobytes())
+    return h.hexdigest()
+
+
+# Order in which value_iteration lays out the actions of a state: the four
+# walks first, then the four runs.  Index < 4 means a walk won the max.
+WALK_RUN_ORDER = [orientations.index(a) for a in orientations if check_run(a) == 0] + \
+                 [orientations.index(a) for a in orientations if check_run(a) == 1]
+
+
+class GridArrays:
+    """Dense index-array form of a GridMDP for the numpy backend.
+
+    States are numbered row-major from the bottom row.  For every action
+    (in `orientations` order) and each of its three outcomes we keep the
+    index of the landing state in `nbr[a, k]` and its probability in
+    `prob[a, k]`, so a Bellman backup is a handful of gathers.
+
+    The same data is the stacked CSR matrix of all actions (row a*n + i,
+    three entries per row), which is what `cache_dir` persists.  Maps that
+    share walls, terminals and Pr_walk/Pr_run load it back with mmap
+    instead of recompiling it.
+
+    With lazy=True nothing is compiled: a backup finds the landing cells
+    of each direction by shifting the open-cell mask, so a sweep needs
+    little more than the value vectors.  The index table (and the cell,
+    xs and ys arrays behind it) is built the first time something asks
+    for `nbr`, as GridSolver and policy_evaluation_np do.
+    """
+
+    # states per block of rows a lazy argmax works on
+    BLOCK = 1 << 16
+
+    def __init__(self, mdp, cache_dir=None):
+        mask = np.zeros((mdp.rows, mdp.cols), dtype=bool)
+        for (x, y) in mdp.states:
+            mask[y, x] = True
+        self._build(mask, mdp.Pr_walk, mdp.Pr_run, mdp.terminals, cache_dir)
+
+        # value_iteration charges R(s)[1] when a walk wins and R(s)[0] for a run
+        self.r_walk = np.array([mdp.R(s)[1] for s in self.order])
+        self.r_run = np.array([mdp.R(s)[0] for s in self.order])
+
+    @classmethod
+    def from_mask(cls, mask, Pr_walk, Pr_run, terminals, reward, cache_dir=None, lazy=False):
+        """Build without a GridMDP from a (rows, cols) bool mask of open
+        cells, bottom row first.  `terminals` maps (x, y) to its reward and
+        every other cell gets getInputs' REWARD pair `reward`."""
+        self = cls.__new__(cls)
+        self._build(mask, Pr_walk, Pr_run, list(terminals), cache_dir, lazy)
+        self._set_rewards(terminals, reward)
+        return self
+
+    def with_rewards(self, terminals, reward):
+        """A copy sharing the compiled transitions, with other terminals
+        and rewards (same arguments as from_mask)."""
+        other = copy.copy(self)
+        other.blocked = self.blocked.copy()
+        other._set_rewards(terminals, reward)
+        return other
+
+    def _set_rewards(self, terminals, reward):
+        self.terminal = np.zeros(self.n, dtype=bool)
+        self.r_walk = np.full(self.n, reward[1])
+        self.r_run = np.full(self.n, reward[0])
+        for s, r in terminals.items():
+            i = self.find(s)
+            if i >= 0:
+                self.terminal[i] = True
+                self.r_walk[i] = self.r_run[i] = r
+
+    def _build(self, mask, Pr_walk, Pr_run, terminals, cache_dir, lazy=False):
+        self.rows, self.cols = mask.shape
+        self.Pr_walk, self.Pr_run = Pr_walk, Pr_run
+        self.mask = mask
+        # states of grid row y are numbered row_start[y]..row_start[y+1]-1
+        self.row_start = np.concatenate([[0], np.cumsum(mask.sum(axis=1))])
+        self.n = n = int(self.row_start[-1])
+        self._order = self._xs = self._ys = self._cell = self._open = None
+
+        self.prob = np.empty((len(orientations), 3))
+        for a, action in enumerate(orientations):
+            p = Pr_run if check_run(action) else Pr_walk
+            self.prob[a] = [p, (1-p)/2, (1-p)/2]
+
+        self.indices = self._nbr = None
+        if not lazy:
+            path = None
+            if cache_dir is not None:
+                path = os.path.join(cache_dir, grid_key(mask, Pr_walk, Pr_run, terminals) + '.npy')
+            self._link(path)
+
+        self.terminal = np.zeros(n, dtype=bool)
+        for s in terminals:
+            i = self.find(s)
+            if i >= 0:
+                self.terminal[i] = True
+        # states walled off after compiling (see GridSolver); they stay in
+        # the numbering as zero-reward terminals nothing can reach
+        self.blocked = np.zeros(n, dtype=bool)
+
+    def _link(self, path=None):
+        """Compile the index table, or load it from the cache file path."""
+        indices = None
+        if path is not None and os.path.exists(path):
+            indices = np.load(path, mmap_mode='r')
+        if indices is None:
+            indices = self._compile()
+            if path is not None:
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                tmp = path + '.%d.tmp' % os.getpid()
+                with open(tmp, 'wb') as f:
+                    np.save(f, indices)
+                os.rename(tmp, path)
+        self.indices = indices
+        # nbr[a, k, i] is a view on the CSR column indices, no copy
+        self._nbr = indices.reshape(len(orientations), self.n, 3).transpose(0, 2, 1)
+
+    @property
+    def nbr(self):
+        """Landing state of outcome k of action a from state i, nbr[a, k, i]."""
+        if self._nbr is None:
+            self._link()
+        return self._nbr
+
+    @property
+    def xs(self):
+        if self._xs is None:
+            self._ys, self._xs = np.nonzero(self.mask)
+        return self._xs
+
+    @property
+    def ys(self):
+        if self._ys is None:
+            self._ys, self._xs = np.nonzero(self.mask)
+        return self._ys
+
+    @property
+    def cell(self):
+        """State index of every grid cell, -1 on walls."""
+        if self._cell is None:
+            self._cell = np.full(self.mask.shape, -1, dtype=np.int64)
+            self._cell[self.ys, self.xs] = np.arange(self.n)
+        return self._cell
+
+    @property
+    def order(self):
+        """The states as (x, y) tuples in index order."""
+        if self._order is None:
+            self._order = list(zip(self.xs.tolist(), self.ys.tolist()))
+        return self._order
+
+    def find(self, s):
+        """Index of state s, or -1 for a wall or a cell off the grid."""
+        x, y = s
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            if self._cell is not None:
+                return int(self._cell[y, x])
+            if self.mask[y, x]:
+                return int(self.row_start[y] + np.count_nonzero(self.mask[y, :x]))
+        return -1
+
+    def _compile(self):
+        """CSR column indices of the stacked transition matrix, (8 * n * 3,)."""
+        indices = np.empty((len(orientations), self.n, 3), dtype=np.int32)
+        for a, action in enumerate(orientations):
+            outcomes = [action, turn_left(action), turn_right(action)]
+            for k, direction in enumerate(outcomes):
+                indices[a, :, k] = self._go(direction)
+        return indices.reshape(-1)
+
+    def matrix(self):
+        """The stacked (8n x n) transition matrix as a scipy CSR matrix."""
+        from scipy.sparse import csr_matrix
+        n = self.n
+        rows = len(orientations) * n
+        data = np.repeat(self.prob, n, axis=0).reshape(-1)
+        indptr = np.arange(0, 3 * rows + 1, 3)
+        if self.indices is None:
+            self._link()
+        return csr_matrix((data, self.indices, indptr), shape=(rows, n))
+
+    def _go(self, direction, idx=None):
+        """Vectorized GridMDP.go: landing index for every state, or for the
+        states numbered in idx."""
+        dx, dy = direction
+        cell = self.cell
+        if idx is None:
+            stay, xs, ys = np.arange(self.n), self.xs, self.ys
+        else:
+            stay, xs, ys = idx, self.xs[idx], self.ys[idx]
+        tx, ty = xs + dx, ys + dy
+        inside = (tx >= 0) & (tx < self.cols) & (ty >= 0) & (ty < self.rows)
+        target = np.full(len(stay), -1, dtype=np.int64)
+        target[inside] = cell[ty[inside], tx[inside]]
+        if check_run(direction):
+            # a run is blocked by a wall in the cell it passes through
+            mx, my = xs + dx // 2, ys + dy // 2
+            mid_inside = (mx >= 0) & (mx < self.cols) & (my >= 0) & (my < self.rows)
+            mid = np.full(len(stay), -1, dtype=np.int64)
+            mid[mid_inside] = cell[my[mid_inside], mx[mid_inside]]
+            target[mid < 0] = -1
+        return np.where(target >= 0, target, stay)
+
+    def relink(self, idx):
+        """Recompute the transitions of the states in idx after self.cell
+        changed around them."""
+        if self.indices is None:
+            self._link()
+        elif not self.indices.flags.writeable:
+            # loaded read-only from the cache; patch a private copy
+            self.indices = np.array(self.indices)
+            self._nbr = self.indices.reshape(len(orientations), self.n, 3).transpose(0, 2, 1)
+        idx = np.asarray(idx, dtype=np.int64)
+        for a, action in enumerate(orientations):
+            outcomes = [action, turn_left(action), turn_right(action)]
+            for k, direction in enumerate(outcomes):
+                self._nbr[a, k, idx] = self._go(direction, idx)
+
+    def to_vector(self, U):
+        return np.array([U[s] for s in self.order])
+
+    def to_dict(self, u):
+        if self.blocked.any():
+            return {s: v for s, v, b in zip(self.order, u.tolist(), self.blocked.tolist()) if not b}
+        return dict(zip(self.order, u.tolist()))
+
+    def q_values(self, u, lo=0, hi=None):
+        """Expected utility of every action, shape (8, n), orientations order.
+
+        Outcomes are summed left to right like expected_utility so the
+        floating point results are identical to the dict-based solver.
+        lo/hi restrict the result to the states numbered lo..hi-1; on lazy
+        arrays they must fall on row boundaries, as bands() cuts them.
+        """
+        src = self._source(u, lo, hi)
+        q = np.empty((len(orientations), len(self.r_walk[lo:hi])))
+        for a in range(len(orientations)):
+            q[a] = self._q(src, a, lo, hi)
+        return q
+
+    def q_value(self, u, a, lo=0, hi=None):
+        """Row a of q_values."""
+        return self._q(self._source(u, lo, hi), a, lo, hi)
+
+    def _q(self, src, a, lo, hi):
+        prob = self.prob[a]
+        if self._nbr is not None:
+            nbr = self._nbr[a, :, lo:hi]
+            return prob[0] * src[nbr[0]] + prob[1] * src[nbr[1]] + prob[2] * src[nbr[2]]
+        # the same sum, accumulated in place
+        action = orientations[a]
+        q = self._landing(src, action, lo, hi)
+        q *= prob[0]
+        for p, d in zip(prob[1:], (turn_left(action), turn_right(action))):
+            v = self._landing(src, d, lo, hi)
+            v *= p
+            q += v
+        return q
+
+    def _rows(self, lo, hi):
+        """The grid rows y0..y1-1 holding the states lo..hi-1."""
+        y0 = int(np.searchsorted(self.row_start, lo, side='right')) - 1
+        y1 = self.rows if hi is None else int(np.searchsorted(self.row_start, hi))
+        return max(y0, 0), y1
+
+    def _source(self, u, lo, hi):
+        """What _q reads u through: u itself once compiled, else u laid out
+        on the rows of states lo..hi-1 plus the two rows and columns a run
+        can reach on every side (zero off the grid)."""
+        if self._nbr is not None:
+            return u
+        if self._open is None:
+            self._open = np.pad(self.mask, 2, mode='constant')
+        y0, y1 = self._rows(lo, hi)
+        ya, yb = max(y0 - 2, 0), min(y1 + 2, self.rows)
+        grid = np.zeros((y1 - y0 + 4, self.cols + 4))
+        grid[ya-y0+2:yb-y0+2, 2:-2][self.mask[ya:yb]] = u[self.row_start[ya]:self.row_start[yb]]
+        return grid
+
+    def _landing(self, grid, direction, lo, hi):
+        """u at the cell GridMDP.go reaches moving `direction` from each of
+        the states lo..hi-1, read off a _source grid by slicing."""
+        y0, y1 = self._rows(lo, hi)
+        h, w = y1 - y0, self.cols
+        dx, dy = direction
+        ok = self._open[y0+2+dy:y1+2+dy, 2+dx:2+dx+w]
+        if check_run(direction):
+            # a run is blocked by a wall in the cell it passes through
+            ok = ok & self._open[y0+2+dy//2:y1+2+dy//2, 2+dx//2:2+dx//2+w]
+        landed = np.where(ok, grid[2+dy:2+dy+h, 2+dx:2+dx+w], grid[2:2+h, 2:2+w])
+        return landed[self.mask[y0:y1]]
+
+    def argmax(self, u, actions, lo=0, hi=None):
+        """Best q_value over `actions` and the position in `actions` of the
+        first action reaching it, keeping one row of q in memory at a time."""
+        if self._nbr is not None:
+            return self._argmax(u, actions, lo, hi)
+        # lazy arrays go a block of rows at a time so the shifted grids
+        # stay small next to u
+        y0, y1 = self._rows(lo, hi)
+        base = self.row_start[y0]
+        best = np.empty(self.row_start[y1] - base)
+        idx = np.empty(len(best), dtype=np.int8)
+        step = max(1, self.BLOCK // max(self.cols, 1))
+        for y in range(y0, y1, step):
+            a, b = self.row_start[y], self.row_start[min(y + step, y1)]
+            if b > a:
+                best[a-base:b-base], idx[a-base:b-base] = self._argmax(u, actions, a, b)
+        return best, idx
+
+    def _argmax(self, u, actions, lo, hi):
+        src = self._source(u, lo, hi)
+        best, idx = None, None
+        for k, a in enumerate(actions):
+            q = self._q(src, a, lo, hi)
+            if best is None:
+                best, idx = q, np.zeros(len(q), dtype=np.int8)
+            else:
+                better = q > best
+                best = np.where(better, q, best)
+                idx[better] = k
+        return best, idx
+
+    def backup(self, u, gamma, lo=0, hi=None):
+        """One synchronous Bellman sweep, same arithmetic as value_iteration."""
+        best, idx = self.argmax(u, WALK_RUN_ORDER, lo, hi)
+        r_walk, r_run, terminal = self.r_walk[lo:hi], self.r_run[lo:hi], self.terminal[lo:hi]
+        # u1 = reward + gamma * best, reusing best's memory
+        u1 = best
+        u1 *= gamma
+        u1 += np.where(idx < 4, r_walk, r_run)
+        u1[terminal] = r_walk[terminal] + gamma * 0.0
+        return u1
+
+    def policy(self, u):
+        """best_policy as a vector of orientation indices, -1 (Exit) on
+        terminals and -2 (a wall) on blocked states."""
+        actions = self.argmax(u, range(len(orientations)))[1]
+        actions[self.terminal] = -1
+        actions[self.blocked] = -2
+        return actions
+
+    def bands(self, count):
+        """Split the states into `count` bands of whole grid rows, as
+        (lo, hi) index ranges."""
+        edges = np.linspace(0, self.rows, count + 1).astype(np.int64)
+        cuts = self.row_start[edges].tolist()
+        return list(zip(cuts[:-1], cuts[1:]))
+
+
+def value_iteration_np(mdp, epsilon=0.1, arrays=None, stats=None):
+    """value_iteration on GridArrays; returns the same U dict."""
+    arrays = arrays or GridArrays(mdp)
+    return arrays.to_dict(value_iteration_vec(arrays, mdp.gamma, epsilon, stats))
+
+
+def value_iteration_vec(arrays, gamma, epsilon=0.1, stats=None, workers=1, u=None):
+    """value_iteration_np on utility vectors, for callers that never build
+    a GridMDP or a U dict.  workers > 1 splits sweeps as in
+    value_iteration_parallel; u warm-starts from earlier utilities."""
+    if workers > 1:
+        return _value_iteration_bands(arrays, gamma, workers, epsilon, stats, u)
+    u1 = np.zeros(arrays.n) if u is None else u
+    epsilon_counter = 0
+    prev_delta = 0
+    fewest, since_fewest = None, 0
+    sweeps = 0
+    while True:
+        sweeps += 1
+        u = u1
+        u1 = arrays.backup(u, gamma)
+        delta = float(np.abs(u1 - u).max(initial=0.0))
+
+        if round(prev_delta,3) == round(delta,3):
+            epsilon_counter+=1
+        # a walk/run flip-flop can also cycle through deltas that never
+        # round alike twice in a row; stop once it stops making progress
+        if fewest is None or delta < fewest:
+            fewest, since_fewest = delta, 0
+        else:
+            since_fewest += 1
+
+        # like value_iteration, hand back the utilities from before this sweep
+        if delta < epsilon * (1 - gamma) / gamma or epsilon_counter > 10 or since_fewest > 100:
+            if stats is not None:
+                stats['sweeps'] = sweeps
+            return u
+        prev_delta = delta
+
+
+def best_policy_np(mdp, U, arrays=None):
+    """best_policy on GridArrays: first action with maximal expected utility."""
+    arrays = arrays or GridArrays(mdp)
+    actions = arrays.policy(arrays.to_vector(U)).tolist()
+    return {s: orientations[a] if a >= 0 else None for s, a in zip(arrays.order, actions)}
+
+
+# Per-process state of a value_iteration_parallel worker, set up by
+# _init_band_worker when the pool starts.
+_band = {}
+
+
+def _init_band_worker(shm_name, n, arrays, gamma):
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _band['shm'] = shm
+    _band['bufs'] = np.ndarray((2, n), dtype=np.float64, buffer=shm.buf)
+    _band['arrays'] = arrays
+    _band['gamma'] = gamma
+
+
+def _band_sweep(task):
+    """Back up the states lo..hi-1 from buffer src into the other buffer
+    and return the band's largest change."""
+    lo, hi, src = task
+    bufs, arrays = _band['bufs'], _band['arrays']
+    u, u1 = bufs[src], bufs[1 - src]
+    if hi == lo:
+        return 0.0
+    u1[lo:hi] = arrays.backup(u, _band['gamma'], lo, hi)
+    return float(np.abs(u1[lo:hi] - u[lo:hi]).max(initial=0.0))
+
+
+def value_iteration_parallel(mdp, workers, epsilon=0.1, arrays=None, stats=None):
+    """value_iteration_np with each sweep split over a process pool.
+
+    The grid is cut into one band of rows per worker.  U is double
+    buffered in shared memory: a sweep reads one buffer and writes the
+    other, and pool.map returning is the barrier after which every band
+    sees its neighbours' new edge rows (the two-row halo a run can reach).
+    Results are bit-for-bit those of value_iteration_np.
+    """
+    arrays = arrays or GridArrays(mdp)
+    return arrays.to_dict(_value_iteration_bands(arrays, mdp.gamma, workers, epsilon, stats))
+
+
+def _value_iteration_bands(arrays, gamma, workers, epsilon, stats, u=None):
+    n = arrays.n
+    bands = arrays.bands(workers)
+    # Python 3.8+, imported here so the script still runs on older ones
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(create=True, size=max(2 * n * 8, 8))
+    bufs = np.ndarray((2, n), dtype=np.float64, buffer=shm.buf)
+    bufs[:] = 0
+    if u is not None:
+        bufs[0] = u
+    pool = multiprocessing.Pool(workers, _init_band_worker, (shm.name, n, arrays, gamma))
+    try:
+        src = 0
+        epsilon_counter = 0
+        prev_delta = 0
+        fewest, since_fewest = None, 0
+        sweeps = 0
+        while True:
+            sweeps += 1
+            delta = max(pool.map(_band_sweep, [(lo, hi, src) for (lo, hi) in bands]))
+
+            if round(prev_delta,3) == round(delta,3):
+                epsilon_counter+=1
+            # as in value_iteration_vec, a delta cycle that never stalls
+            if fewest is None or delta < fewest:
+                fewest, since_fewest = delta, 0
+            else:
+                since_fewest += 1
+
+            # like value_iteration, hand back the utilities from before this sweep
+            if delta < epsilon * (1 - gamma) / gamma or epsilon_counter > 10 or since_fewest > 100:
+                if stats is not None:
+                    stats['sweeps'] = sweeps
+                return bufs[src].copy()
+            prev_delta = delta
+            src = 1 - src
+    finally:
+        pool.terminate()
+        pool.join()
+        del bufs
+        shm.close()
+        shm.unlink()
+
+
+class GridSolver:
+    """Value iteration kept alive across queries on one map.
+
+    update() applies deltas to the compiled GridArrays in place: rewards
+    and terminals only touch the reward vectors and the terminal mask, and
+    a new wall relinks just the open cells one walk or run away from it.
+    Opening a cell that was a wall at compile time recompiles the grid with
+    the current living reward, carrying over the utilities of the cells
+    that remain.  The next solve() warm-starts from the previous utilities.
+
+    A warm answer is not the cold one.  Value iteration stops within its
+    tolerance of the fixed point, not on it, and the backup switches between
+    the walk and run reward by argmax, so it is not a contraction.  Where it
+    settles the two answers are near each other (a 60x60 random map: 6
+    cells' policies differ, max |dU| 0.15); where states keep flipping
+    between a walk and a run (sample input2) they can differ on about a
+    third of the cells, and the warm start may take more sweeps than a cold
+    one.  compare=True also runs a cold start and reports its sweeps, how
+    many cells' policies differ from it and the largest utility gap.
+
+    Cells are GridMDP (x, y) states; rewards use getInputs' REWARD order
+    ([0] for runs, [1] for walks).
+    """
+
+    def __init__(self, arrays, gamma, epsilon=0.1):
+        self.arrays = arrays
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.u = None
+        self.stats = {}
+        A = arrays
+        self.terminals = {s: float(A.r_walk[A.find(s)]) for s, t in zip(A.order, A.terminal.tolist()) if t}
+        ordinary = np.flatnonzero(~A.terminal)
+        self.reward = [float(A.r_run[ordinary[0]]), float(A.r_walk[ordinary[0]])] if len(ordinary) else None
+        self._walled = {}
+
+    @classmethod
+    def from_mdp(cls, mdp, epsilon=0.1, cache_dir=None):
+        return cls(GridArrays(mdp, cache_dir=cache_dir), mdp.gamma, epsilon)
+
+    def solve(self, compare=False, workers=1):
+        """Run value iteration from the last utilities; returns U as a vector."""
+        stats = {}
+        self.u = value_iteration_vec(self.arrays, self.gamma, self.epsilon, stats, workers, self.u)
+        if compare:
+            cold = {}
+            u = value_iteration_vec(self.arrays, self.gamma, self.epsilon, cold, workers)
+            open_cells = ~self.arrays.blocked
+            stats['cold_sweeps'] = cold['sweeps']
+            stats['policy_diff'] = int((self.arrays.policy(u) != self.policy())[open_cells].sum())
+            stats['max_diff'] = float(np.abs(u - self.u)[open_cells].max(initial=0.0))
+        self.stats = stats
+        return self.u
+
+    @property
+    def U(self):
+        return self.arrays.to_dict(self.u)
+
+    def policy(self):
+        return self.arrays.policy(self.u)
+
+    def update(self, reward=None, terminals=None, walls=(), open_cells=(), gamma=None):
+        """Apply a delta.  terminals maps a cell to its new reward, or to
+        None to turn a terminal back into an ordinary cell."""
+        A = self.arrays
+        if gamma is not None:
+            self.gamma = gamma
+        if reward is not None:
+            self.reward = list(reward)
+            ordinary = ~A.terminal & ~A.blocked
+            A.r_walk[ordinary] = reward[1]
+            A.r_run[ordinary] = reward[0]
+        for s, r in (terminals or {}).items():
+            if r is None:
+                self.terminals.pop(s, None)
+            else:
+                self.terminals[s] = r
+            i = A.find(s)
+            if i >= 0:
+                self._set_cell(i, s)
+        for s in walls:
+            self._wall(s)
+        fresh = [s for s in open_cells if s not in self._walled and A.find(s) < 0]
+        for s in open_cells:
+            if s in self._walled:
+                self._unwall(s)
+        if fresh:
+            self._recompile(fresh)
+
+    def _set_cell(self, i, s):
+        A = self.arrays
+        A.terminal[i] = s in self.terminals
+        if s in self.terminals:
+            A.r_walk[i] = A.r_run[i] = self.terminals[s]
+        else:
+            A.r_walk[i], A.r_run[i] = self.reward[1], self.reward[0]
+
+    def _neighbours(self, s):
+        found = [self.arrays.find(vector_add(s, d)) for d in orientations]
+        return [i for i in found if i >= 0]
+
+    def _wall(self, s):
+        A = self.arrays
+        i = A.find(s)
+        if i < 0:
+            return
+        self._walled[s] = i
+        A.cell[s[1], s[0]] = -1
+        A.blocked[i] = A.terminal[i] = True
+        A.r_walk[i] = A.r_run[i] = 0.0
+        if self.u is not None:
+            self.u[i] = 0.0
+        A.relink(self._neighbours(s))
+
+    def _unwall(self, s):
+        A = self.arrays
+        i = self._walled.pop(s)
+        A.cell[s[1], s[0]] = i
+        A.blocked[i] = False
+        self._set_cell(i, s)
+        A.relink([i] + self._neighbours(s))
+
+    def _recompile(self, cells):
+        old = self.arrays
+        mask = old.cell >= 0
+        for (x, y) in cells:
+            if 0 <= x < old.cols and 0 <= y < old.rows:
+                mask[y, x] = True
+        self.arrays = GridArrays.from_mask(mask, old.Pr_walk, old.Pr_run, self.terminals, self.reward)
+        self._walled = {}
+        if self.u is not None:
+            prev = old.cell[self.arrays.ys, self.arrays.xs]
+            u = np.zeros(self.arrays.n)
+            u[prev >= 0] = self.u[prev[prev >= 0]]
+            self.u = u
+
+
+def policy_evaluation_np(arrays, actions, u, gamma, k=None):
+    """Evaluate the policy given as orientation indices per state.
+
+    With k=None the linear system (I - gamma * P_pi) u = r_pi is solved
+    exactly with a sparse solver; otherwise k synchronous sweeps are run
+    starting from u.  Returns the new u and the change in its last sweep.
+
+    The exact solve raises ValueError when the system is singular, which
+    happens when gamma is 1 and some state never reaches a terminal.
+    """
+    n = arrays.n
+    states = np.arange(n)
+    run = np.array([check_run(a) for a in orientations], dtype=bool)[actions]
+    r = np.where(run, arrays.r_run, arrays.r_walk)
+    r[arrays.terminal] = arrays.r_walk[arrays.terminal]
+    nbr = arrays.nbr[actions, :, states]
+    prob = arrays.prob[actions]
+    prob[arrays.terminal] = 0.0
+
+    if k is None:
+        from scipy.sparse import csr_matrix, identity
+        from scipy.sparse.linalg import spsolve, MatrixRankWarning
+        P = csr_matrix((prob.reshape(-1), nbr.reshape(-1), np.arange(0, 3 * n + 1, 3)),
+                       shape=(n, n))
+        with warnings.catch_warnings():
+            # spsolve only warns on a singular matrix and hands back NaN
+            warnings.simplefilter('ignore', MatrixRankWarning)
+            u1 = spsolve((identity(n, format='csr') - gamma * P).tocsc(), r)
+        if not np.isfinite(u1).all():
+            raise ValueError("policy evaluation is singular: with gamma = %r some state "
+                             "never reaches a terminal under this policy" % gamma)
+        return u1, float(np.abs(u1 - u).max(initial=0.0))
+
+    delta = 0
+    for i in range(k):
+        u1 = r + gamma * (prob[:, 0] * u[nbr[:, 0]] + prob[:, 1] * u[nbr[:, 1]] + prob[:, 2] * u[nbr[:, 2]])
+        delta = float(np.abs(u1 - u).max(initial=0.0))
+        u = u1
+    return u, delta
+
+
+def policy_iteration_np(mdp, k=None, epsilon=0.1, arrays=None, stats=None):
+    """Policy iteration on GridArrays; returns the same U dict as
+    policy_iteration, improving by the same rule as GridArrays.backup.
+
+    k=None evaluates each policy exactly (needs scipy); an integer k gives
+    modified policy iteration with k evaluation sweeps per improvement.
+    A policy the exact solve cannot evaluate (gamma = 1 and a state that
+    never reaches a terminal) gets policy_iteration's 20 sweeps instead.
+    Stops on policy_iteration's stall rule as well.
+    """
+    arrays = arrays or GridArrays(mdp)
+    gamma = mdp.gamma
+    u = np.zeros(arrays.n)
+    actions = np.zeros(arrays.n, dtype=np.int64)
+    walk_run = np.array(WALK_RUN_ORDER)
+    epsilon_counter = 0
+    fewest = arrays.n + 1
+    iterations = 0
+    solves = 0
+    sweeps = 0
+    while True:
+        iterations += 1
+        exact = k is None
+        if exact:
+            try:
+                u, delta = policy_evaluation_np(arrays, actions, u, gamma)
+                solves += 1
+            except ValueError:
+                exact = False
+                u, delta = policy_evaluation_np(arrays, actions, u, gamma, 20)
+                sweeps += 20
+        else:
+            u, delta = policy_evaluation_np(arrays, actions, u, gamma, k)
+            sweeps += k
+        # the action backup() would pick: first best E[U], walks before runs
+        greedy = walk_run[arrays.argmax(u, WALK_RUN_ORDER)[1]]
+        greedy[arrays.terminal] = actions[arrays.terminal]
+        changed = int((greedy != actions).sum())
+        actions = greedy
+
+        if changed >= fewest:
+            epsilon_counter+=1
+        fewest = min(fewest, changed)
+
+        if (changed == 0 and (exact or delta < epsilon * (1 - gamma) / gamma)) or epsilon_counter > 10:
+            if stats is not None:
+                stats['iterations'] = iterations
+                if k is None:
+                    stats['solves'] = solves
+                if sweeps:
+                    stats['sweeps'] = sweeps
+            return arrays.to_dict(u)
+
+
 def print_grid(mapping):
         return list(reversed([[mapping.get((x, y), None)
                                for x in range(6)]
                               for y in range(5)]))
 
-def getInputs():
-    INPUT_FILE_NAME = "input.txt"
+def read_input(file_name):
+    """Parse a GridWorld input file into a dict of its fields.
 
-    with open(INPUT_FILE_NAME, 'r') as f:
+    WALL_CELLS is a set and TERMINAL_STATES a dict to its reward, both keyed
+    by (row, col) as read, so placing them on the grid is a lookup instead
+    of a list scan."""
+    param = {}
+    with open(file_name, 'r') as f:
         GRID_ROW, GRID_COL = map(int,f.readline().strip().split(","))
 
         WALL_CELLS_NUM = int(f.readline().strip())
-        WALL_CELLS = list()
-        WALL_CELLS_POSITION = list()
+        WALL_CELLS = set()
         for i in range(WALL_CELLS_NUM):
             WALL_CELLS_POSITION = f.readline().strip().split(",")
-            WALL_CELLS.append((int(WALL_CELLS_POSITION[0]),int(WALL_CELLS_POSITION[1])))
+            WALL_CELLS.add((int(WALL_CELLS_POSITION[0]),int(WALL_CELLS_POSITION[1])))
 
         TERMINAL_STATES_NUM = int(f.readline().strip())
-        TERMINAL_STATES = list()
-        T_REWARD = list()
+        TERMINAL_STATES = dict()
         for i in range(TERMINAL_STATES_NUM):
-            terminal_line = list()
             terminal_line = f.readline().strip().split(",")
             T_POSITION = (int(terminal_line[0]),int(terminal_line[1]))
-            T_REWARD.append(terminal_line[2])
-            TERMINAL_STATES.append(T_POSITION)
-
-        Pr_walk, Pr_run = map(float,f.readline().strip().split(","))
-
-        REWARD = list()
-        REWARD = map(float,f.readline().strip().split(","))
-
-        DISCOUNT_FACTOR = float(f.readline().strip())
-
-        #print(GRID_ROW,GRID_COL, WALL_CELLS, TERMINAL_STATES, T_REWARD,Pr_walk, Pr_run, REWARD, DISCOUNT_FACTOR)
-
-        gridRow = list()
-        for i in range(int(GRID_ROW)):
-            gridColumn = list()
-            for j in range(int(GRID_COL)):
-                if (GRID_ROW-i,j+1) in WALL_CELLS:
-                    tmpList = None
-                    gridColumn.append(tmpList)
-                elif (GRID_ROW-i,j+1) in TERMINAL_STATES:
-                    idx = TERMINAL_STATES.index((GRID_ROW-i,j+1))
-                    tmpList = [float(T_REWARD[idx]),float(T_REWARD[idx])]
-                    gridColumn.append(tmpList)
-                else:
-                    tmpList = REWARD
-                    gridColumn.append(tmpList)
-            gridRow.append(gridColumn)
-        #print_table(gridRow)
-
-        for i in range(len(TERMINAL_STATES)):
-            TERMINAL_STATES[i] = (TERMINAL_STATES[i][1]-1, TERMINAL_STATES[i][0]-1)
-
-        x = GridMDP(gridRow, Pr_walk, Pr_run, terminals=TERMINAL_STATES, gamma=DISCOUNT_FACTOR)
-        util = value_iteration(x)
-        pi = best_policy(x, util)
-        move_i = x.to_arrows(pi)
-        print_output(move_i)
-        #print_table(move_i)
-
-def print_output(outputResult):
-    OUTPUT_FILE_NAME = "output.txt"
-    output = ""
-    wfile = open(OUTPUT_FILE_NAME, "w")
-    for i in range(len(outputResult)):
-        for j in range(len(outputResult[i])):
-            if j != len(outputResult[i])-1:
-                output+=str(outputResult[i][j])+ ","
+            TERMINAL_STATES.setdefault(T_POSITION, float(terminal_line[2]))
+
+        param["Pr_walk"], param["Pr_run"] = map(float,f.readline().strip().split(","))
+        param["REWARD"] = list(map(float,f.readline().strip().split(",")))
+        param["DISCOUNT_FACTOR"] = float(f.readline().strip())
+
+    param["GRID_ROW"], param["GRID_COL"] = GRID_ROW, GRID_COL
+    param["WALL_CELLS"] = WALL_CELLS
+    param["TERMINAL_STATES"] = TERMINAL_STATES
+    return param
+
+
+def input_mask(param):
+    """Open-cell mask of a read_input map with row 1 first, the way
+    GridMDP flips its grid; no per-cell Python objects are built."""
+    GRID_ROW, GRID_COL = param["GRID_ROW"], param["GRID_COL"]
+    mask = np.ones((GRID_ROW, GRID_COL), dtype=bool)
+    for (row, col) in param["WALL_CELLS"]:
+        if 1 <= row <= GRID_ROW and 1 <= col <= GRID_COL:
+            mask[row-1, col-1] = False
+    return mask
+
+
+def input_arrays(param, cache_dir=None, geometry=None):
+    """GridArrays for a read_input map, lazy unless cache_dir keeps the
+    compiled transitions.  geometry is GridArrays already built for the
+    same walls and Pr_walk/Pr_run, which is reused instead of building
+    them again."""
+    terminals = {(col-1, row-1): r for ((row, col), r) in param["TERMINAL_STATES"].items()}
+    if geometry is not None:
+        return geometry.with_rewards(terminals, param["REWARD"])
+    return GridArrays.from_mask(input_mask(param), param["Pr_walk"], param["Pr_run"],
+                                terminals, param["REWARD"], cache_dir=cache_dir,
+                                lazy=cache_dir is None)
+
+
+def input_mdp(param):
+    """GridMDP for a read_input map, for the dict-based solvers."""
+    GRID_ROW, GRID_COL = param["GRID_ROW"], param["GRID_COL"]
+    WALL_CELLS, TERMINAL_STATES, REWARD = param["WALL_CELLS"], param["TERMINAL_STATES"], param["REWARD"]
+    gridRow = list()
+    for i in range(int(GRID_ROW)):
+        gridColumn = list()
+        for j in range(int(GRID_COL)):
+            if (GRID_ROW-i,j+1) in WALL_CELLS:
+                gridColumn.append(None)
+            elif (GRID_ROW-i,j+1) in TERMINAL_STATES:
+                tReward = TERMINAL_STATES[(GRID_ROW-i,j+1)]
+                gridColumn.append([tReward,tReward])
             else:
-                output+=str(outputResult[i][j])+ "\n"
-    wfile.write(output)
+                gridColumn.append(REWARD)
+        gridRow.append(gridColumn)
+    #print_table(gridRow)
+
+    terminals = [(col-1, row-1) for (row, col) in TERMINAL_STATES]
+    return GridMDP(gridRow, param["Pr_walk"], param["Pr_run"], terminals=terminals,
+                   gamma=param["DISCOUNT_FACTOR"])
+
+
+def solve_input(input_file, output_file, cache_dir=None, workers=1, geometry=None, stats=None):
+    """Solve one input file into output_file; returns the GridArrays used
+    (None without numpy) so callers can share its transitions."""
+    param = read_input(input_file)
+    if np is not None:
+        arrays = input_arrays(param, cache_dir, geometry)
+        util = value_iteration_vec(arrays, param["DISCOUNT_FACTOR"], stats=stats, workers=workers)
+        write_policy(output_file, arrays, arrays.policy(util))
+        return arrays
+
+    x = input_mdp(param)
+    util = value_iteration(x, stats=stats)
+    pi = best_policy(x, util)
+    move_i = x.to_arrows(pi)
+    print_output(move_i, output_file)
+    #print_table(move_i)
+
+
+def getInputs(cache_dir=None, workers=1, stats=None):
+    INPUT_FILE_NAME = "input.txt"
+    OUTPUT_FILE_NAME = "output.txt"
+    solve_input(INPUT_FILE_NAME, OUTPUT_FILE_NAME, cache_dir=cache_dir, workers=workers, stats=stats)
+
+
+def batch_inputs(paths):
+    """Input files named by paths: a directory stands for its input*.txt,
+    any other file is a manifest listing inputs one per line (relative to
+    the manifest)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(f for f in sorted(glob.glob(os.path.join(path, 'input*.txt')))
+                         if not f.endswith('.out.txt'))
+        else:
+            base = os.path.dirname(path)
+            with open(path) as f:
+                files.extend(os.path.join(base, line.strip()) for line in f
+                             if line.strip() and not line.startswith('#'))
+    return files
+
+
+def batch_output(input_file):
+    """inputN.txt -> inputN.out.txt, so expected outputN.txt files next to
+    the samples are left alone."""
+    root, ext = os.path.splitext(input_file)
+    return root + '.out' + ext
+
+
+def _solve_batch_group(task):
+    files, cache_dir = task
+    rows = []
+    geometry = None
+    for input_file in files:
+        stats = {}
+        start = time.time()
+        shared = geometry is not None
+        arrays = solve_input(input_file, batch_output(input_file), cache_dir=cache_dir,
+                             geometry=geometry, stats=stats)
+        geometry = geometry or arrays
+        rows.append([input_file, arrays.n if arrays is not None else '-', stats['sweeps'],
+                     'yes' if shared else 'no', round(time.time() - start, 3)])
+    return rows
+
+
+def solve_batch(paths, workers=1, cache_dir=None):
+    """Solve many inputs in one process pool and print a timing table.
+
+    Inputs with the same walls and Pr_walk/Pr_run go to the same task and
+    share one compile of the transition model."""
+    files = batch_inputs(paths)
+    groups = {}
+    for input_file in files:
+        if np is None:
+            key = input_file
+        else:
+            param = read_input(input_file)
+            key = grid_key(input_mask(param), param["Pr_walk"], param["Pr_run"], [])
+        groups.setdefault(key, []).append(input_file)
+
+    start = time.time()
+    pool = multiprocessing.Pool(workers)
+    try:
+        rows = [row for group in pool.imap(_solve_batch_group, [(g, cache_dir) for g in groups.values()])
+                for row in group]
+    finally:
+        pool.close()
+        pool.join()
+    rows.sort(key=lambda row: files.index(row[0]))
+    print_table(rows, header=['input', 'states', 'sweeps', 'shared model', 'seconds'])
+    print("%d inputs, %d models, %.3fs" % (len(files), len(groups), time.time() - start))
+    return rows
+
+def print_output(outputResult, OUTPUT_FILE_NAME="output.txt"):
+    with open(OUTPUT_FILE_NAME, "w") as wfile:
+        for row in outputResult:
+            wfile.write(",".join(str(cell) for cell in row) + "\n")
+
+def write_policy(file_name, arrays, actions):
+    """Write a policy vector from GridArrays.policy in print_output's
+    format, top row first, holding one row of strings at a time."""
+    names = [ARROWS[a] for a in orientations] + ['None', ARROWS[None]]  # -2 wall, -1 Exit
+    row_start = arrays.row_start.tolist()
+    with open(file_name, "w") as wfile:
+        for y in reversed(range(arrays.rows)):
+            lo, hi = row_start[y], row_start[y+1]
+            row = ['None'] * arrays.cols
+            for x, a in zip(np.flatnonzero(arrays.mask[y]).tolist(), actions[lo:hi].tolist()):
+                row[x] = names[a]
+            wfile.write(",".join(row) + "\n")
 
 def makingGrid():
     print()
 
 ## start
-getInputs()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve the GridWorld in input.txt into output.txt')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes for value iteration (needs numpy), '
+                             'or for solving files with --batch')
+    parser.add_argument('--cache', metavar='DIR', default=None,
+                        help='directory caching compiled transition matrices')
+    parser.add_argument('--batch', metavar='PATH', nargs='+',
+                        help='solve every input*.txt of these directories or the files listed '
+                             'in these manifests, writing inputN.out.txt next to each')
+    parser.add_argument('--stats', metavar='FILE', default=None,
+                        help='write the solver counters (sweeps) to FILE as JSON')
+    args = parser.parse_args()
+    if args.batch:
+        solve_batch(args.batch, workers=args.workers, cache_dir=args.cache)
+    else:
+        stats = {}
+        getInputs(cache_dir=args.cache, workers=args.workers, stats=stats)
+        if args.stats:
+            with open(args.stats, 'w') as f:
+                json.dump(stats, f)
 
 
 
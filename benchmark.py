@@ -0,0 +1,325 @@
+"""
+Benchmark suite for the three homework solvers
+
+Generates random instances for each solver, runs the solver script on
+every instance in its own process and records to JSON
+
+    - wall time and peak RSS of the solver process
+    - HW1 : node_count (last line of output.txt), effective branching
+            factor, first move cutoff rate and table hits (--stats); with
+            --samples also the
+            HW1/sample_test_cases boards at each --depths, once per
+            --workers count, with the speedup over the first count
+    - HW2 : search nodes, backtracks and node rate (--stats), once per
+            value ordering (--lcv exact / neighbours); with --samples also
+            propagations, max depth and seconds per phase for every
+            HW2/sample_test_cases input
+    - HW3 : value iteration sweeps (--stats)
+
+Each solver is swept over one size parameter, so the records of a run
+form a scaling curve: search depth for HW1, group count for HW2 and grid
+side for HW3.  With --compare, times and counters are checked against an
+earlier JSON file and regressions over --tolerance are listed.
+
+usage : python benchmark.py --out bench.json
+        python benchmark.py --only hw1 --samples --depths 5 6 7 8 --workers 1 2 4
+        python benchmark.py --only hw3 --sides 100 1000 2000 --out big.json
+        python benchmark.py --compare bench.json --out new.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = {
+    'hw1': os.path.join(ROOT, 'HW1', 'hw1cs561s2018.py'),
+    'hw2': os.path.join(ROOT, 'HW2', 'hw2cs561s2018.py'),
+    'hw3': os.path.join(ROOT, 'HW3', 'hw3cs561s2018.py'),
+}
+CONFEDERATIONS = ['AFC', 'CAF', 'CONCACAF', 'CONMEBOL', 'UEFA', 'OFC']
+LCV_MODES = ['exact', 'neighbours']
+# counters compared by --compare, besides wall_time
+COUNTERS = ['node_count', 'nodes', 'backtracks', 'sweeps']
+
+
+def random_board(rng, depth, pieces=6, algorithm='ALPHABETA'):
+    """HW1 input: an 8x8 board with `pieces` squares per side taken on the
+    dark squares and random increasing row weights.  Only a player's last
+    row (H for Star, A for Circle) may hold a stack."""
+    dark = [(r, c) for r in range(8) for c in range(8) if (r + c) % 2 == 1]
+    rng.shuffle(dark)
+    board = [['0'] * 8 for r in range(8)]
+    for player, last in (('S', 0), ('C', 7)):
+        for k in range(pieces):
+            r, c = dark.pop()
+            board[r][c] = '%s%d' % (player, rng.choice([1, 1, 1, 2]) if r == last else 1)
+    weights = sorted(rng.sample(range(1, 1000), 8))
+    lines = [rng.choice(['Star', 'Circle']), algorithm, str(depth)]
+    lines += [','.join(row) for row in board]
+    lines.append(','.join(map(str, weights)))
+    return '\n'.join(lines) + '\n'
+
+
+def random_worldcup(rng, groups, pots=4):
+    """HW2 input: groups * pots teams dealt evenly over `pots` pots and at
+    random over the six confederations."""
+    names = ['Team%03d' % i for i in range(groups * pots)]
+    rng.shuffle(names)
+    conf = dict((c, []) for c in CONFEDERATIONS)
+    for name in names:
+        conf[rng.choice(CONFEDERATIONS)].append(name)
+    lines = [str(groups), str(pots)]
+    lines += [','.join(names[i::pots]) for i in range(pots)]
+    lines += ['%s:%s' % (c, ','.join(conf[c]) or 'None') for c in CONFEDERATIONS]
+    return '\n'.join(lines) + '\n'
+
+
+def write_gridworld(path, rng, rows, cols, walls=0.1, terminals=4):
+    """HW3 input, written line by line so grids of millions of cells never
+    hold the whole text in memory."""
+    seed = rng.random()
+    wall_rng = random.Random(seed)
+    count = sum(1 for i in range(rows * cols) if wall_rng.random() < walls)
+    with open(path, 'w') as f:
+        f.write('%d,%d\n%d\n' % (rows, cols, count))
+        # replay the same draws to list the walls the count was taken of
+        wall_rng = random.Random(seed)
+        for i in range(rows * cols):
+            if wall_rng.random() < walls:
+                f.write('%d,%d\n' % (i // cols + 1, i % cols + 1))
+        f.write('%d\n' % terminals)
+        for t in range(terminals):
+            r = rng.choice([-1.0, 1.0]) * rng.uniform(1, 100)
+            f.write('%d,%d,%.2f\n' % (rng.randint(1, rows), rng.randint(1, cols), r))
+        f.write('0.8,0.6\n-0.04,-0.04\n0.9\n')
+
+
+def run(solver, workdir, args=(), python=None, timeout=None):
+    """Run one solver script in workdir.  The exit is collected with
+    os.wait4 so the peak RSS is that child's alone."""
+    cmd = [python or sys.executable, SCRIPTS[solver]] + list(args)
+    start = time.time()
+    # stderr goes to a file, a pipe left unread could stall a chatty solver
+    err = tempfile.TemporaryFile(dir=workdir)
+    proc = subprocess.Popen(cmd, cwd=workdir, stdout=subprocess.DEVNULL, stderr=err)
+    timed_out = False
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if timeout and time.time() - start > timeout:
+            proc.kill()
+            pid, status, usage = os.wait4(proc.pid, 0)
+            timed_out = True
+            break
+        time.sleep(0.005)
+    # already reaped; keep Popen from waiting on the pid again
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    err.seek(0)
+    message = err.read().decode('utf-8', 'replace').strip()
+    err.close()
+
+    record = {'wall_time': round(time.time() - start, 4), 'peak_rss_kb': usage.ru_maxrss,
+              'returncode': 'timeout' if timed_out else proc.returncode}
+    if record['returncode'] != 0 and message:
+        record['error'] = message.splitlines()[-1]
+    return record
+
+
+def read_stats(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def bench_hw1(rng, workdir, depths, python=None, timeout=None):
+    records = []
+    for algorithm in ['MINIMAX', 'ALPHABETA']:
+        for depth in depths:
+            with open(os.path.join(workdir, 'input.txt'), 'w') as f:
+                f.write(random_board(rng, depth, algorithm=algorithm))
+            record = {'solver': 'hw1', 'algorithm': algorithm, 'depth': depth}
+            stats = os.path.join(workdir, 'stats.json')
+            record.update(run('hw1', workdir, ['--stats', stats], python=python, timeout=timeout))
+            output = os.path.join(workdir, 'output.txt')
+            if record['returncode'] == 0 and os.path.exists(output):
+                with open(output) as f:
+                    record['node_count'] = int(f.read().split()[-1])
+            searches = read_stats(stats).get('searches')
+            if searches:
+                search = searches[-1]
+                record.update(branching=search['branching'], first_cutoff_rate=search['first_cutoff_rate'],
+                              tt_hits=search['totals']['tt_hits'])
+            if os.path.exists(stats):
+                os.remove(stats)
+            records.append(record)
+    return records
+
+
+def bench_hw1_samples(workdir, depths, workers, python=None, timeout=None):
+    records = []
+    samples = os.path.join(ROOT, 'HW1', 'sample_test_cases')
+    for name in sorted(n for n in os.listdir(samples) if n.startswith('input')):
+        with open(os.path.join(samples, name)) as f:
+            lines = f.read().splitlines()[:12]
+        for depth in depths:
+            lines[2] = str(depth)
+            with open(os.path.join(workdir, 'input.txt'), 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            base = None
+            for count in workers:
+                record = {'solver': 'hw1', 'sample': name, 'algorithm': lines[1], 'depth': depth,
+                          'workers': count}
+                record.update(run('hw1', workdir, ['--workers', str(count)], python=python, timeout=timeout))
+                output = os.path.join(workdir, 'output.txt')
+                if record['returncode'] == 0 and os.path.exists(output):
+                    with open(output) as f:
+                        record['node_count'] = int(f.read().split()[-1])
+                    base = base or record['wall_time']
+                    record['speedup'] = round(base / record['wall_time'], 2)
+                records.append(record)
+    return records
+
+
+def bench_hw2(rng, workdir, groups, python=None, timeout=None):
+    records = []
+    for count in groups:
+        path = os.path.join(workdir, 'input.txt')
+        with open(path, 'w') as f:
+            f.write(random_worldcup(rng, count))
+        for lcv in LCV_MODES:
+            stats = os.path.join(workdir, 'stats.json')
+            record = {'solver': 'hw2', 'groups': count, 'lcv': lcv}
+            record.update(run('hw2', workdir, [path, '--stats', stats, '--lcv', lcv],
+                              python=python, timeout=timeout))
+            record.update(read_stats(stats))
+            if 'nodes' in record:
+                record['node_rate'] = round(record['nodes'] / record['wall_time'], 1)
+            output = os.path.join(workdir, 'output.txt')
+            if record['returncode'] == 0 and os.path.exists(output):
+                with open(output) as f:
+                    record['result'] = f.readline().strip()
+            if os.path.exists(stats):
+                os.remove(stats)
+            records.append(record)
+    return records
+
+
+def bench_hw2_samples(workdir, python=None, timeout=None):
+    records = []
+    samples = os.path.join(ROOT, 'HW2', 'sample_test_cases')
+    names = [n for n in os.listdir(samples) if n[0].isdigit()]
+    for name in sorted(names, key=lambda n: int(n.split('.')[0])):
+        stats = os.path.join(workdir, 'stats.json')
+        record = {'solver': 'hw2', 'sample': name}
+        record.update(run('hw2', workdir, [os.path.join(samples, name), '--stats', stats],
+                          python=python, timeout=timeout))
+        record.update(read_stats(stats))
+        if os.path.exists(stats):
+            os.remove(stats)
+        records.append(record)
+    return records
+
+
+def bench_hw3(rng, workdir, sides, python=None, timeout=None):
+    records = []
+    for side in sides:
+        write_gridworld(os.path.join(workdir, 'input.txt'), rng, side, side)
+        stats = os.path.join(workdir, 'stats.json')
+        record = {'solver': 'hw3', 'rows': side, 'cols': side}
+        record.update(run('hw3', workdir, ['--stats', stats], python=python, timeout=timeout))
+        record.update(read_stats(stats))
+        if os.path.exists(stats):
+            os.remove(stats)
+        records.append(record)
+    return records
+
+
+def instance(record):
+    """The fields naming an instance, to match records across two runs."""
+    return tuple(sorted((k, v) for k, v in record.items()
+                        if k in ('solver', 'algorithm', 'depth', 'workers', 'groups', 'lcv',
+                                 'sample', 'rows', 'cols')))
+
+
+def compare(baseline, records, tolerance):
+    """Lines for every record slower or expanding more than `tolerance`
+    (a fraction) over the baseline record of the same instance."""
+    old = dict((instance(r), r) for r in baseline['records'])
+    lines = []
+    for record in records:
+        before = old.get(instance(record))
+        if before is None:
+            continue
+        for key in ['wall_time'] + COUNTERS:
+            if key in record and key in before and before[key]:
+                ratio = float(record[key]) / before[key]
+                if ratio > 1 + tolerance:
+                    lines.append('%s %s: %s -> %s (%.2fx)' % (
+                        dict(instance(record)), key, before[key], record[key], ratio))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=sorted(SCRIPTS), default=sorted(SCRIPTS))
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 2, 3, 4],
+                        help='HW1 search depths')
+    parser.add_argument('--groups', type=int, nargs='+', default=[4, 6, 8],
+                        help='HW2 group counts (4 pots of that many teams)')
+    parser.add_argument('--samples', action='store_true',
+                        help='also run HW1 and HW2 on each of their sample inputs')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1],
+                        help='HW1 sample runs: worker process counts to compare')
+    parser.add_argument('--sides', type=int, nargs='+', default=[50, 200, 1000],
+                        help='HW3 grid sides; 1000 is a million cells')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=None, help='seconds per run')
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--compare', metavar='JSON', default=None,
+                        help='earlier --out file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench')
+    records = []
+    # a fresh generator per solver, so --only runs see the same instances
+    try:
+        if 'hw1' in args.only:
+            records += bench_hw1(random.Random(args.seed), workdir, args.depths, timeout=args.timeout)
+            if args.samples:
+                records += bench_hw1_samples(workdir, args.depths, args.workers, timeout=args.timeout)
+        if 'hw2' in args.only:
+            records += bench_hw2(random.Random(args.seed), workdir, args.groups, timeout=args.timeout)
+            if args.samples:
+                records += bench_hw2_samples(workdir, timeout=args.timeout)
+        if 'hw3' in args.only:
+            records += bench_hw3(random.Random(args.seed), workdir, args.sides, timeout=args.timeout)
+    finally:
+        shutil.rmtree(workdir)
+
+    for record in records:
+        print(json.dumps(record, sort_keys=True))
+    with open(args.out, 'w') as f:
+        json.dump({'seed': args.seed, 'python': sys.version.split()[0], 'records': records},
+                  f, indent=1, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            lines = compare(json.load(f), records, args.tolerance)
+        for line in lines:
+            print('regression: ' + line)
+        if lines:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()